@@ -0,0 +1,20 @@
+"""Benchmarks for Woma's request hot path.
+
+Run them with::
+
+    python -m benchmarks
+
+That measures route lookup (``Routes.get``), routing and dispatch
+(``Router.__call__`` with a bare WSGI endpoint), and full ``Endpoint``
+dispatch (request, response and controller) against synthetic route tables
+of 10 to 10,000 routes. For each, it reports throughput and p50/p99 latency.
+
+Save the results and compare a later run against them to catch regressions::
+
+    python -m benchmarks --save baseline.json
+    # ...change things...
+    python -m benchmarks --compare baseline.json
+
+See ``python -m benchmarks --help`` for all the options.
+
+"""
@@ -0,0 +1,183 @@
+"""Run the benchmarks. See the ``benchmarks`` package docstring."""
+import argparse
+import json
+import sys
+
+from webob import Request
+
+from benchmarks.tables import generate_routes, sample_paths
+from woma.router import Route, Router, Routes
+from woma.stats import measure
+
+SIZES = (10, 100, 1000, 10000)
+
+
+def bench_routes_get(routes, paths):
+    """Routes.get: route lookup only."""
+    table = Routes()
+    for route in routes:
+        table.add(Route(route.template, None))
+    return measure(table.get, [(path,) for path in paths])
+
+
+def bench_routes_get_cached(routes, paths):
+    """Routes.get with a cache of recent matches (see Routes)."""
+    table = Routes(cache_size=len(routes))
+    for route in routes:
+        table.add(Route(route.template, None))
+    return measure(table.get, [(path,) for path in paths])
+
+
+def bench_router_call(routes, paths):
+    """Router.__call__: routing and dispatch to a bare WSGI endpoint."""
+    router = Router()
+    for route in routes:
+        router.map_endpoint(route.template, _wsgi_app)
+    return measure(router, _wsgi_calls(paths))
+
+
+def bench_endpoint_dispatch(routes, paths):
+    """Router.__call__ with Endpoints: request, response and controller."""
+    router = Router()
+    for route in routes:
+        router.add(route.template, get=_controller)
+
+    def call(environ, start_response):
+        return b''.join(router(environ, start_response))
+
+    return measure(call, _wsgi_calls(paths))
+
+
+BENCHMARKS = {
+    'routes_get': bench_routes_get,
+    'routes_get_cached': bench_routes_get_cached,
+    'router_call': bench_router_call,
+    'endpoint_dispatch': bench_endpoint_dispatch,
+}
+
+
+def run(names, sizes, dynamic_ratio, depth, requests):
+    """Run the named benchmarks for each table size, returning the results.
+
+    Results map ``'<benchmark>/<size>'`` to the Stats for that run.
+
+    """
+    results = {}
+    for size in sizes:
+        routes = generate_routes(size, dynamic_ratio=dynamic_ratio,
+                                 depth=depth)
+        paths = sample_paths(routes, requests)
+        for name in names:
+            # warm up caches (e.g. compiled patterns) before measuring
+            BENCHMARKS[name](routes, paths[:10])
+            results['%s/%d' % (name, size)] = BENCHMARKS[name](routes, paths)
+    return results
+
+
+def report(results, baseline=None, threshold=0.1, out=sys.stdout):
+    """Print results, compared to a baseline if given.
+
+    Returns the names of results whose p50 latency regressed by more than
+    ``threshold`` (a fraction) against the baseline.
+
+    """
+    regressions = []
+    header = '%-24s %12s %10s %10s' % ('benchmark', 'ops/sec', 'p50 us',
+                                       'p99 us')
+    if baseline:
+        header += '  %s' % 'p50 vs baseline'
+    out.write(header + '\n')
+    for key, stats in sorted(results.items(), key=_sort_key):
+        line = '%-24s %12.0f %10.2f %10.2f' % (
+            key, stats.throughput, stats.p50 * 1e6, stats.p99 * 1e6)
+        if baseline and key in baseline:
+            change = stats.p50 / baseline[key]['p50'] - 1
+            line += '  %+14.1f%%' % (change * 100)
+            if change > threshold:
+                regressions.append(key)
+                line += '  REGRESSION'
+        out.write(line + '\n')
+    return regressions
+
+
+def save(results, path):
+    data = {
+        key: {'throughput': stats.throughput, 'p50': stats.p50,
+              'p99': stats.p99}
+        for key, stats in results.items()
+    }
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks', description='Benchmark Woma.')
+    parser.add_argument(
+        'benchmarks', nargs='*', metavar='BENCHMARK',
+        help='benchmarks to run: %s (default: all)' % ', '.join(
+            sorted(BENCHMARKS)))
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=SIZES,
+        help='route table sizes (default: %(default)s)')
+    parser.add_argument(
+        '--dynamic-ratio', type=float, default=0.5,
+        help='fraction of routes with a dynamic segment (default: 0.5)')
+    parser.add_argument(
+        '--depth', type=int, default=3,
+        help='maximum number of static segments per path (default: 3)')
+    parser.add_argument(
+        '--requests', type=int, default=5000,
+        help='requests per benchmark (default: %(default)s)')
+    parser.add_argument('--save', metavar='FILE', help='save results to FILE')
+    parser.add_argument(
+        '--compare', metavar='FILE', help='compare results to those in FILE')
+    parser.add_argument(
+        '--threshold', type=float, default=0.1,
+        help='p50 slowdown vs baseline that counts as a regression '
+             '(default: 0.1 for 10%%)')
+    args = parser.parse_args(argv)
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error('unknown benchmark: %s' % name)
+
+    baseline = load(args.compare) if args.compare else None
+    results = run(args.benchmarks or sorted(BENCHMARKS), args.sizes,
+                  args.dynamic_ratio, args.depth, args.requests)
+    regressions = report(results, baseline, args.threshold)
+    if args.save:
+        save(results, args.save)
+    return 1 if regressions else 0
+
+
+def _wsgi_app(environ, start_response):
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return [b'']
+
+
+def _controller(request, response):
+    response.write('ok')
+    return response
+
+
+def _start_response(status, headers, exc_info=None):
+    pass
+
+
+def _wsgi_calls(paths):
+    # environs are built up front so only the app is timed
+    return [(Request.blank(path).environ, _start_response) for path in paths]
+
+
+def _sort_key(item):
+    name, size = item[0].rsplit('/', 1)
+    return name, int(size)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""Measure Woma's startup: import time and first-request latency.
+
+Run it with::
+
+    python -m benchmarks.startup
+
+Each measurement runs in a fresh interpreter, so nothing is already imported
+or compiled. It reports the time to import ``woma.router``, and the latency
+of the first requests to a synthetic route table, with and without
+``router.warmup()`` before them.
+
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+from woma.stats import percentile
+
+# Runs in a fresh interpreter. Prints the import time and the latency of the
+# first few requests, in seconds, as JSON.
+SCRIPT = """
+import json
+import time
+
+start = time.perf_counter()
+from woma.router import Router
+import_time = time.perf_counter() - start
+
+from webob import Request
+from benchmarks.tables import generate_routes, sample_paths
+
+routes = generate_routes(%(size)d)
+router = Router()
+for i, route in enumerate(routes):
+    router.add(route.template, get=lambda request, response: response,
+               name='route%%d' %% i)
+if %(warmup)r:
+    router.warmup()
+
+latencies = []
+for path in sample_paths(routes, %(requests)d):
+    environ = Request.blank(path).environ
+    start = time.perf_counter()
+    b''.join(router(environ, lambda status, headers: None))
+    latencies.append(time.perf_counter() - start)
+print(json.dumps({'import': import_time, 'latencies': latencies}))
+"""
+
+
+def measure_startup(size, requests, warmup):
+    """Return (import time, first request latencies) from a new process."""
+    script = SCRIPT % {'size': size, 'requests': requests, 'warmup': warmup}
+    output = subprocess.check_output([sys.executable, '-c', script])
+    result = json.loads(output.decode('utf-8'))
+    return result['import'], result['latencies']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.startup',
+        description="Measure Woma's import time and first-request latency.")
+    parser.add_argument(
+        '--size', type=int, default=1000,
+        help='route table size (default: %(default)s)')
+    parser.add_argument(
+        '--requests', type=int, default=10,
+        help='first requests to time (default: %(default)s)')
+    parser.add_argument(
+        '--runs', type=int, default=5,
+        help='fresh interpreters per measurement (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    print('%-24s %10s %14s %14s' % (
+        'startup', 'import ms', 'first req us', 'p50 first us'))
+    for warmup in (False, True):
+        imports, firsts, rest = [], [], []
+        for _ in range(args.runs):
+            import_time, latencies = measure_startup(
+                args.size, args.requests, warmup)
+            imports.append(import_time)
+            firsts.append(latencies[0])
+            rest.extend(latencies)
+        print('%-24s %10.1f %14.1f %14.1f' % (
+            'with warmup' if warmup else 'cold',
+            percentile(sorted(imports), 50) * 1e3,
+            percentile(sorted(firsts), 50) * 1e6,
+            percentile(sorted(rest), 50) * 1e6))
+
+
+if __name__ == '__main__':
+    main()
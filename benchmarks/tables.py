@@ -0,0 +1,63 @@
+"""Synthetic route tables to benchmark against."""
+import random
+from collections import namedtuple
+
+SyntheticRoute = namedtuple('SyntheticRoute', ['template', 'example'])
+SyntheticRoute.__doc__ = """A route path and a concrete path it matches."""
+
+WORDS = (
+    'accounts', 'articles', 'assets', 'authors', 'comments', 'events',
+    'files', 'groups', 'images', 'invoices', 'orders', 'pages', 'posts',
+    'products', 'reports', 'settings', 'tags', 'teams', 'users', 'widgets',
+)
+
+
+def generate_routes(count, dynamic_ratio=0.5, depth=3, seed=0):
+    """Return a list of ``count`` distinct SyntheticRoutes.
+
+    - dynamic_ratio: the fraction of routes with a ``{name}`` segment.
+    - depth: the maximum number of segments in a path.
+    - seed: the same seed always generates the same table.
+
+    >>> routes = generate_routes(4, seed=1)
+    >>> len(routes)
+    4
+    >>> all(route.template.startswith('/') for route in routes)
+    True
+
+    """
+    rand = random.Random(seed)
+    routes = []
+    seen = set()
+    while len(routes) < count:
+        n = len(routes)
+        dynamic = rand.random() < dynamic_ratio
+        segments = [rand.choice(WORDS) for _ in range(rand.randint(1, depth))]
+        # make every route unique without relying on luck
+        segments[0] = '%s%d' % (segments[0], n)
+
+        template_segments = list(segments)
+        example_segments = list(segments)
+        if dynamic:
+            position = rand.randrange(1, len(segments) + 1)
+            template_segments.insert(position, '{id%d}' % n)
+            example_segments.insert(position, str(rand.randint(1, 10 ** 6)))
+
+        template = '/' + '/'.join(template_segments)
+        if template in seen:
+            continue
+        seen.add(template)
+        routes.append(
+            SyntheticRoute(template, '/' + '/'.join(example_segments)))
+    return routes
+
+
+def sample_paths(routes, count=1000, seed=0):
+    """Return ``count`` example paths spread evenly across the table.
+
+    Routes near the start, middle and end of the table are all represented,
+    so lookups that slow down as the table grows show up in the results.
+
+    """
+    rand = random.Random(seed)
+    return [rand.choice(routes).example for _ in range(count)]
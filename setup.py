@@ -17,16 +17,17 @@ setup(
     author='Justin Blake',
     author_email='justin@blaix.com',
     packages=['woma'],
+    # async def, and asyncio.run in woma.http.Client
+    python_requires='>=3.7',
     classifiers=[
         'Development Status :: 3 - Alpha',
         'Intended Audience :: Developers',
         'Topic :: Software Development :: Build Tools',
         'License :: OSI Approved :: MIT License',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.3',
-        'Programming Language :: Python :: 3.4',
-        'Programming Language :: Python :: 3.5',
-        'Programming Language :: Python :: 3.6',
+        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
         'Topic :: Internet :: WWW/HTTP :: Dynamic Content',
         'Topic :: Internet :: WWW/HTTP :: WSGI :: Application',
         'Topic :: Software Development :: Libraries :: Application Frameworks',
@@ -34,6 +35,8 @@ setup(
     install_requires=['property-caching>=1.0,<2.0', 'WebOb>=1.5,<2.0'],
     # TODO: move test requirements to tox
     extras_require={
+        'brotli': ['brotli'],
+        'json': ['orjson'],
         'dev': [
             'flake8',
             'flake8-quotes',
@@ -0,0 +1,180 @@
+import asyncio
+import threading
+from unittest import TestCase
+
+from woma.asgi import ASGIApp, environ_from_scope
+from woma.endpoints import Endpoint
+from woma.router import Router
+
+
+def call(app, path='/', method='GET', body=b'', headers=()):
+    scope = {
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'query_string': b'',
+        'headers': list(headers),
+    }
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start = sent[0]
+    body = b''.join(message.get('body', b'') for message in sent[1:])
+    return start['status'], dict(start['headers']), body
+
+
+class TestASGIApp(TestCase):
+    def setUp(self):
+        self.router = Router()
+        self.app = ASGIApp(self.router)
+
+    def test_calls_sync_controllers_in_another_thread(self):
+        threads = []
+
+        def controller(request, response):
+            threads.append(threading.current_thread())
+            response.write('sync %s' % request.kwargs['name'])
+            return response
+
+        self.router.add('/hello/{name}', get=controller)
+        status, _, body = call(self.app, '/hello/Bob')
+
+        self.assertEqual((status, body), (200, b'sync Bob'))
+        self.assertIsNot(threads[0], threading.current_thread())
+
+    def test_awaits_async_controllers(self):
+        async def controller(request, response):
+            await asyncio.sleep(0)
+            response.write('async %s' % request.kwargs['name'])
+            return response
+
+        self.router.add('/hello/{name}', get=controller)
+        status, _, body = call(self.app, '/hello/Amy')
+
+        self.assertEqual((status, body), (200, b'async Amy'))
+
+    def test_awaits_async_controllers_wrapped_in_sync_middleware(self):
+        async def controller(request, response):
+            response.write('async')
+            return response
+
+        def passthrough(handler):
+            return lambda request, response: handler(request, response)
+
+        self.router.add('/foo', get=controller)
+        self.router.use(passthrough)
+        status, _, body = call(self.app, '/foo')
+
+        self.assertEqual((status, body), (200, b'async'))
+
+    def test_uses_not_found_for_unmatched_paths(self):
+        status, _, body = call(self.app, '/asdf')
+        self.assertEqual((status, body), (404, b"We can't find /asdf\n"))
+
+    def test_uses_method_not_allowed_for_unmapped_methods(self):
+        self.router.add('/foo', get=lambda request, response: response)
+        status, _, body = call(self.app, '/foo', method='DELETE')
+        self.assertEqual((status, body), (405, b'DELETE is not allowed\n'))
+
+    def test_passes_request_body_to_controller(self):
+        def controller(request, response):
+            response.write(request.text.upper())
+            return response
+
+        self.router.add('/echo', post=controller)
+        status, _, body = call(self.app, '/echo', method='POST', body=b'hi')
+        self.assertEqual(body, b'HI')
+
+    def test_serves_plain_wsgi_endpoints(self):
+        def wsgi_app(environ, start_response):
+            start_response('201 Created', [('X-Foo', 'bar')])
+            return [b'made']
+
+        self.router.map_endpoint('/wsgi', wsgi_app)
+        status, headers, body = call(self.app, '/wsgi')
+        self.assertEqual((status, body), (201, b'made'))
+        self.assertEqual(headers[b'x-foo'], b'bar')
+
+    def test_router_asgi_is_an_asgi_app_for_the_router(self):
+        self.assertIs(self.router.asgi.router, self.router)
+        self.assertIs(self.router.asgi, self.router.asgi)
+
+    def test_does_not_keep_requests_in_environ(self):
+        environs = []
+
+        def controller(request, response):
+            environs.append(request.environ)
+            return response
+
+        self.router.add('/', get=controller)
+        call(self.app)
+        self.assertNotIn('woma.request', environs[0])
+
+    def test_rejects_bodies_over_max_body_size(self):
+        calls = []
+
+        def controller(request, response):
+            calls.append(request.body)
+            return response
+
+        self.router.add('/', post=controller)
+        app = ASGIApp(self.router, max_body_size=4)
+        status, _, body = call(app, method='POST', body=b'12345')
+        self.assertEqual(status, 413)
+        self.assertEqual(calls, [])
+        status, _, _ = call(app, method='POST', body=b'1234')
+        self.assertEqual((status, calls), (200, [b'1234']))
+
+
+class TestEndpointAsyncControllersUnderWSGI(TestCase):
+    def test_runs_async_controller_to_completion(self):
+        from woma.http import Client
+
+        async def controller(request, response):
+            response.write('done')
+            return response
+
+        self.assertEqual(Client(Endpoint(controller)).get().text, 'done')
+
+
+class TestEnvironFromScope(TestCase):
+    """environ_from_scope(scope, body)"""
+
+    def setUp(self):
+        self.scope = {
+            'type': 'http',
+            'method': 'POST',
+            'root_path': '/app',
+            'path': '/app/café',
+            'query_string': b'a=1',
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'x-thing', b'one'),
+                (b'x-thing', b'two'),
+            ],
+        }
+        self.environ = environ_from_scope(self.scope, b'{}')
+
+    def test_splits_root_path_into_script_name(self):
+        self.assertEqual(self.environ['SCRIPT_NAME'], '/app')
+        self.assertEqual(
+            self.environ['PATH_INFO'].encode('latin-1'),
+            '/café'.encode('utf-8'))
+
+    def test_copies_method_and_query_string(self):
+        self.assertEqual(self.environ['REQUEST_METHOD'], 'POST')
+        self.assertEqual(self.environ['QUERY_STRING'], 'a=1')
+
+    def test_converts_headers(self):
+        self.assertEqual(self.environ['CONTENT_TYPE'], 'application/json')
+        self.assertEqual(self.environ['HTTP_X_THING'], 'one,two')
+
+    def test_provides_body_as_wsgi_input(self):
+        self.assertEqual(self.environ['wsgi.input'].read(), b'{}')
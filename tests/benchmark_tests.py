@@ -0,0 +1,59 @@
+from io import StringIO
+from unittest import TestCase
+
+from benchmarks.__main__ import report
+from benchmarks.tables import generate_routes
+from woma.router import Route, Routes
+from woma.stats import Stats, measure
+
+
+class TestGenerateRoutes(TestCase):
+    """generate_routes(count)"""
+
+    def test_generates_distinct_routes(self):
+        routes = generate_routes(500)
+        templates = set(route.template for route in routes)
+        self.assertEqual(len(templates), 500)
+
+    def test_examples_match_their_own_route(self):
+        routes = generate_routes(200)
+        table = Routes()
+        for route in routes:
+            table.add(Route(route.template, route))
+        for route in routes:
+            self.assertEqual(table.get(route.example).endpoint, route)
+
+    def test_generates_static_and_dynamic_routes(self):
+        routes = generate_routes(100, dynamic_ratio=0.5)
+        dynamic = [route for route in routes if '{' in route.template]
+        self.assertTrue(0 < len(dynamic) < 100)
+
+    def test_is_deterministic_for_a_seed(self):
+        self.assertEqual(generate_routes(50, seed=3),
+                         generate_routes(50, seed=3))
+
+
+class TestMeasure(TestCase):
+    """measure(func, args_list)"""
+
+    def test_calls_func_with_each_args_tuple(self):
+        calls = []
+        stats = measure(lambda *args: calls.append(args), [(1,), (2, 3)])
+        self.assertEqual(calls, [(1,), (2, 3)])
+        self.assertEqual(stats.count, 2)
+
+
+class TestReport(TestCase):
+    """report(results, baseline)"""
+
+    def test_returns_regressions_over_threshold(self):
+        results = {
+            'slower/10': Stats(count=10, total=1.0, p50=1.2, p99=2.0),
+            'same/10': Stats(count=10, total=1.0, p50=1.0, p99=2.0),
+        }
+        baseline = {
+            'slower/10': {'p50': 1.0},
+            'same/10': {'p50': 1.0},
+        }
+        regressions = report(results, baseline, 0.1, out=StringIO())
+        self.assertEqual(regressions, ['slower/10'])
@@ -0,0 +1,222 @@
+from unittest import TestCase
+
+from webob import Request
+
+from woma.cache import ResponseCache
+from woma.endpoints import Endpoint
+from woma.http import Client
+from woma.router import Router
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class CacheTestCase(TestCase):
+    def setUp(self):
+        self.calls = []
+        self.clock = FakeClock()
+        self.cache = ResponseCache(ttl=10, clock=self.clock)
+        self.headers = {}
+        self.router = Router()
+        self.router.add('/things/{name}', get=self.controller,
+                        post=self.controller, cache=self.cache)
+        self.client = Client(self.router)
+
+    def controller(self, request, response):
+        self.calls.append((request.method, request.path_qs))
+        response.write('%s %d' % (request.kwargs['name'], len(self.calls)))
+        for name, value in self.headers.items():
+            response.headers[name] = value
+        return response
+
+
+class TestResponseCache(CacheTestCase):
+    def test_serves_repeat_requests_from_cache(self):
+        first = self.client.get('/things/a')
+        second = self.client.get('/things/a')
+
+        self.assertEqual(second.text, first.text)
+        self.assertEqual(second.headerlist, first.headerlist)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_counts_hits_and_misses(self):
+        self.client.get('/things/a')
+        self.client.get('/things/a')
+        self.client.get('/things/b')
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+    def test_caches_paths_separately(self):
+        self.client.get('/things/a')
+        self.assertEqual(self.client.get('/things/b').text, 'b 2')
+
+    def test_caches_query_strings_separately(self):
+        self.client.get('/things/a?page=1')
+        self.assertEqual(self.client.get('/things/a?page=2').text, 'a 2')
+
+    def test_answers_head_from_cached_get(self):
+        self.client.get('/things/a')
+        response = self.client.head('/things/a')
+        self.assertEqual(response.content_length, 3)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_answers_matching_if_none_match_with_not_modified(self):
+        self.headers = {'ETag': '"v1"'}
+        self.client.get('/things/a')
+        response = self.client.get(
+            '/things/a', headers={'If-None-Match': 'W/"v1"'})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.body, b'')
+        self.assertEqual(len(self.calls), 1)
+
+    def test_does_not_cache_other_methods(self):
+        self.client.post('/things/a')
+        self.client.post('/things/a')
+        self.assertEqual(len(self.calls), 2)
+
+    def test_expires_responses_after_ttl(self):
+        self.client.get('/things/a')
+        self.clock.now = 10
+        self.assertEqual(self.client.get('/things/a').text, 'a 2')
+
+    def test_uses_max_age_from_cache_control(self):
+        self.headers['Cache-Control'] = 'max-age=100'
+        self.client.get('/things/a')
+        self.clock.now = 50
+        self.assertEqual(self.client.get('/things/a').text, 'a 1')
+
+    def test_does_not_cache_no_store_responses(self):
+        self.headers['Cache-Control'] = 'no-store'
+        self.client.get('/things/a')
+        self.assertEqual(self.client.get('/things/a').text, 'a 2')
+
+    def test_does_not_cache_private_responses(self):
+        self.headers['Cache-Control'] = 'private'
+        self.client.get('/things/a')
+        self.assertEqual(self.client.get('/things/a').text, 'a 2')
+
+    def test_invalidate_drops_responses_for_path(self):
+        self.client.get('/things/a')
+        self.client.get('/things/b')
+        self.cache.invalidate('/things/a')
+
+        self.assertEqual(self.client.get('/things/a').text, 'a 3')
+        self.assertEqual(self.client.get('/things/b').text, 'b 2')
+
+    def test_clear_drops_all_responses(self):
+        self.client.get('/things/a')
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.size, 0)
+
+
+class TestResponseCacheVary(CacheTestCase):
+    def _get(self, path, headers):
+        request = Request.blank(path, headers=headers)
+        return request.get_response(self.router)
+
+    def test_keys_on_headers_named_in_vary(self):
+        self.headers['Vary'] = 'Accept-Language'
+        self._get('/things/a', {'Accept-Language': 'en'})
+        self._get('/things/a', {'Accept-Language': 'en'})
+        self._get('/things/a', {'Accept-Language': 'fr'})
+        self.assertEqual(len(self.calls), 2)
+
+    def test_does_not_cache_vary_star(self):
+        self.headers['Vary'] = '*'
+        self.client.get('/things/a')
+        self.client.get('/things/a')
+        self.assertEqual(len(self.calls), 2)
+
+    def test_keys_on_configured_headers(self):
+        self.cache.headers = ('HTTP_AUTHORIZATION',)
+        self._get('/things/a', {'Authorization': 'alice'})
+        self._get('/things/a', {'Authorization': 'bob'})
+        self.assertEqual(len(self.calls), 2)
+
+    def test_keeps_other_variants_when_one_expires(self):
+        self.headers['Vary'] = 'Accept-Language'
+        self._get('/things/a', {'Accept-Language': 'en'})
+        self.clock.now = 5
+        self._get('/things/a', {'Accept-Language': 'fr'})
+        self.clock.now = 11
+        self._get('/things/a', {'Accept-Language': 'en'})
+        self._get('/things/a', {'Accept-Language': 'fr'})
+        self._get('/things/a', {'Accept-Language': 'en'})
+        self.assertEqual(len(self.calls), 3)
+
+
+class TestResponseCacheEviction(TestCase):
+    def test_evicts_least_recently_used_responses_over_budget(self):
+        cache = ResponseCache(max_bytes=350)
+
+        def controller(request, response):
+            response.write('x' * 100)
+            return response
+
+        client = Client(Endpoint(controller, cache=cache))
+
+        client.get('/one')
+        client.get('/two')
+        client.get('/one')
+        client.get('/three')
+
+        self.assertLessEqual(cache.size, 350)
+        self.assertEqual(len(cache), 2)
+        client.get('/one')
+        self.assertEqual(cache.hits, 2)
+
+    def test_keeps_other_variants_when_one_is_evicted(self):
+        cache = ResponseCache(max_bytes=400)
+
+        def controller(request, response):
+            response.write('x' * 100)
+            response.vary = ('Accept',)
+            return response
+
+        app = Endpoint(controller, cache=cache)
+
+        def get(path, accept):
+            return Request.blank(path, accept=accept).get_response(app)
+
+        get('/one', 'a')
+        get('/one', 'b')
+        get('/two', 'a')
+        self.assertEqual(len(cache), 2)
+        for _ in range(4):
+            get('/one', 'b')
+        self.assertEqual(cache.hits, 4)
+
+
+class TestResponseCacheWithMiddleware(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+
+        def auth(handler):
+            def authorized_handler(request, response):
+                if request.authorization is None:
+                    response.status = 401
+                    return response
+                return handler(request, response)
+            return authorized_handler
+        self.router.use(auth)
+
+    def test_runs_middleware_for_cached_responses(self):
+        authorized = self.client.get(
+            '/things/a', {'Authorization': 'Basic YTpi'})
+        anonymous = self.client.get('/things/a')
+        self.assertEqual(authorized.status_code, 200)
+        self.assertEqual(anonymous.status_code, 401)
+        self.assertEqual(anonymous.text, '')
+
+    def test_serves_repeat_requests_from_cache(self):
+        for _ in range(3):
+            response = self.client.get(
+                '/things/a', {'Authorization': 'Basic YTpi'})
+        self.assertEqual(response.text, 'a 1')
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 1))
@@ -0,0 +1,64 @@
+from unittest import TestCase
+
+from woma.http import Client
+from woma.router import Router
+
+
+def echo(request, response):
+    response.write('%s %s %s %s' % (
+        request.method, request.path_qs, request.headers.get('X-Test'),
+        request.text))
+    return response
+
+
+class ClientTestCase(TestCase):
+    def setUp(self):
+        self.router = Router()
+        self.router.add('/echo', echo)
+        self.client = Client(self.router)
+
+
+class TestClientRequest(ClientTestCase):
+    """client.request(path, method, body, headers, query)"""
+
+    def test_makes_requests_with_every_verb(self):
+        for verb in ('get', 'post', 'put', 'patch', 'delete'):
+            response = getattr(self.client, verb)('/echo')
+            self.assertTrue(response.text.startswith(verb.upper()))
+        self.assertEqual(self.client.head('/echo').status_code, 200)
+        self.assertEqual(self.client.options('/echo').status_code, 200)
+
+    def test_sends_headers_query_and_body(self):
+        response = self.client.post(
+            '/echo', b'body', headers={'X-Test': 'yes'}, query={'a': [1, 2]})
+        self.assertEqual(response.text, 'POST /echo?a=1&a=2 yes body')
+
+    def test_requests_asgi_apps(self):
+        client = Client(self.router.asgi)
+        self.assertTrue(client.asgi)
+        response = client.put('/echo', 'body', query='a=1')
+        self.assertEqual(response.text, 'PUT /echo?a=1 None body')
+        self.assertEqual(response.content_length, len(response.body))
+
+
+class TestClientRun(ClientTestCase):
+    """client.run(requests, concurrency=1)"""
+
+    requests = ['/echo', ('/echo', 'POST', 'body'), ('/missing', 'GET')]
+
+    def assert_run(self, run):
+        self.assertEqual([response.status_code for response in run.responses],
+                         [200, 200, 404])
+        self.assertEqual(run.responses[1].text, 'POST /echo None body')
+        self.assertEqual(run.stats.count, 3)
+        self.assertGreater(run.stats.total, 0)
+
+    def test_makes_requests_in_order(self):
+        self.assert_run(self.client.run(self.requests))
+
+    def test_makes_requests_concurrently_on_threads(self):
+        self.assert_run(self.client.run(self.requests, concurrency=3))
+
+    def test_makes_requests_concurrently_on_an_event_loop(self):
+        client = Client(self.router.asgi)
+        self.assert_run(client.run(self.requests, concurrency=3))
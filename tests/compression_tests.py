@@ -0,0 +1,126 @@
+import gzip
+import zlib
+from unittest import TestCase
+
+from woma.compression import Compression
+from woma.endpoints import Endpoint
+from woma.http import Client
+from woma.router import Router
+
+BODY = 'compress me ' * 100
+
+
+def controller(request, response):
+    response.write(BODY)
+    return response
+
+
+def streaming_controller(request, response):
+    response.stream(BODY for _ in range(3))
+    return response
+
+
+class CompressionTestCase(TestCase):
+    def get(self, controller, accept='gzip', **kwargs):
+        self.compression = Compression(**kwargs)
+        endpoint = Endpoint(get=controller, middleware=[self.compression])
+        headers = {'Accept-Encoding': accept} if accept else {}
+        return Client(endpoint).get(headers=headers)
+
+
+class TestCompression(CompressionTestCase):
+    def test_compresses_with_accepted_encoding(self):
+        response = self.get(controller)
+        self.assertEqual(response.content_encoding, 'gzip')
+        self.assertEqual(gzip.decompress(response.body).decode(), BODY)
+        self.assertEqual(response.content_length, len(response.body))
+
+    def test_compresses_with_deflate(self):
+        response = self.get(controller, accept='deflate')
+        self.assertEqual(response.content_encoding, 'deflate')
+        self.assertEqual(zlib.decompress(response.body).decode(), BODY)
+
+    def test_adds_vary_header(self):
+        self.assertEqual(self.get(controller).vary, ('Accept-Encoding',))
+        self.assertEqual(
+            self.get(controller, accept=None).vary, ('Accept-Encoding',))
+
+    def test_does_not_compress_without_accepted_encoding(self):
+        self.assertIsNone(self.get(controller, accept=None).content_encoding)
+        self.assertIsNone(
+            self.get(controller, accept='identity').content_encoding)
+
+    def test_does_not_compress_small_bodies(self):
+        response = self.get(controller, min_size=len(BODY) + 1)
+        self.assertIsNone(response.content_encoding)
+        self.assertEqual(response.text, BODY)
+
+    def test_does_not_compress_encoded_bodies(self):
+        def encoded(request, response):
+            response.body = gzip.compress(BODY.encode())
+            response.content_encoding = 'gzip'
+            return response
+        response = self.get(encoded)
+        self.assertEqual(gzip.decompress(response.body).decode(), BODY)
+
+    def test_does_not_compress_other_content_types(self):
+        def image(request, response):
+            response = controller(request, response)
+            response.content_type = 'image/png'
+            return response
+        self.assertIsNone(self.get(image).content_encoding)
+
+    def test_compresses_streamed_bodies(self):
+        response = self.get(streaming_controller)
+        self.assertEqual(response.content_encoding, 'gzip')
+        self.assertEqual(gzip.decompress(response.body).decode(), BODY * 3)
+
+    def test_compresses_async_controllers(self):
+        async def async_controller(request, response):
+            return controller(request, response)
+        response = self.get(async_controller)
+        self.assertEqual(gzip.decompress(response.body).decode(), BODY)
+
+    def test_compresses_app_iter_without_content_length(self):
+        def controller(request, response):
+            response.app_iter = [BODY.encode()]
+            return response
+
+        response = self.get(controller)
+        self.assertEqual(gzip.decompress(response.body).decode(), BODY)
+
+
+class TestCompressionCache(CompressionTestCase):
+    def test_reuses_compressed_bodies(self):
+        compression = Compression(cache_size=10)
+        endpoint = Endpoint(get=controller, middleware=[compression])
+        client = Client(endpoint)
+        first = client.get(headers={'Accept-Encoding': 'gzip'})
+        second = client.get(headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(first.body, second.body)
+        self.assertEqual((compression.hits, compression.misses), (1, 1))
+
+    def test_evicts_least_recently_used_bodies(self):
+        compression = Compression(cache_size=1)
+        client = Client(Endpoint(get=controller, middleware=[compression]))
+        client.get(headers={'Accept-Encoding': 'gzip'})
+        client.get(headers={'Accept-Encoding': 'deflate'})
+        client.get(headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual((compression.hits, compression.misses), (0, 3))
+
+    def test_does_not_share_bodies_between_resources_with_the_same_etag(self):
+        def page(text):
+            def controller(request, response):
+                response.write(text * 1000)
+                response.etag = 'v1'
+                return response
+            return controller
+
+        router = Router()
+        router.add('/a', get=page('a'))
+        router.add('/b', get=page('b'))
+        router.use(Compression(cache_size=100))
+        client = Client(router)
+        client.get('/a', {'Accept-Encoding': 'gzip'})
+        response = client.get('/b', {'Accept-Encoding': 'gzip'})
+        self.assertEqual(gzip.decompress(response.body).decode(), 'b' * 1000)
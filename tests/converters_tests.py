@@ -0,0 +1,48 @@
+import uuid
+from unittest import TestCase
+
+from woma.converters import (IntConverter, StringConverter, compile_template,
+                             parse_placeholder)
+from woma.exceptions import RouteError
+
+
+class TestParsePlaceholder(TestCase):
+    """parse_placeholder(placeholder)"""
+
+    def test_defaults_to_string_converter(self):
+        name, converter = parse_placeholder('slug')
+        self.assertEqual(name, 'slug')
+        self.assertIsInstance(converter, StringConverter)
+
+    def test_uses_named_converter(self):
+        name, converter = parse_placeholder('id:int')
+        self.assertEqual(name, 'id')
+        self.assertIsInstance(converter, IntConverter)
+
+    def test_raises_RouteError_for_unknown_converter(self):
+        with self.assertRaises(RouteError):
+            parse_placeholder('id:nope')
+
+
+class TestCompileTemplate(TestCase):
+    """compile_template(template)"""
+
+    def test_escapes_static_text(self):
+        regex, placeholders = compile_template('/foo.json')
+        self.assertEqual(regex, r'/foo\.json')
+        self.assertEqual(placeholders, [])
+
+    def test_uses_named_groups_if_asked(self):
+        regex, _ = compile_template('/{id:int}', named=True)
+        self.assertEqual(regex, '/(?P<id>[0-9]+)')
+
+
+class TestConverters(TestCase):
+    def test_int_converts_to_int(self):
+        _, converter = parse_placeholder('x:int')
+        self.assertEqual(converter.to_python('42'), 42)
+
+    def test_uuid_converts_to_uuid(self):
+        _, converter = parse_placeholder('x:uuid')
+        value = '6fa459ea-ee8a-3ca4-894e-db77e160355e'
+        self.assertEqual(converter.to_python(value), uuid.UUID(value))
@@ -1,6 +1,12 @@
+import gc
+import weakref
 from unittest import TestCase
 
+from tdubs import Mock, verify
+
 from woma.endpoints import Endpoint
+from woma.http import Client, StaticResponse
+from woma.router import Router
 
 
 class TestEndpointEquality(TestCase):
@@ -15,3 +21,198 @@ class TestEndpointEquality(TestCase):
         endpoint1 = Endpoint(get=controller1, post=controller2)
         endpoint2 = Endpoint(get=controller1, delete=controller2)
         self.assertNotEqual(endpoint1, endpoint2)
+
+
+class TestEndpointAutomaticMethods(TestCase):
+    def setUp(self):
+        self.calls = []
+        self.endpoint = Endpoint(get=self.controller, post=self.controller)
+        self.client = Client(self.endpoint)
+
+    def controller(self, request, response):
+        self.calls.append(request.method)
+        response.write('body')
+        return response
+
+    def test_head_uses_get_controller_without_body(self):
+        response = self.client.head()
+        self.assertEqual(self.calls, ['HEAD'])
+        self.assertEqual(response.body, b'')
+        self.assertEqual(response.content_length, 4)
+
+    def test_head_uses_head_controller_if_given(self):
+        head = Endpoint(get=self.controller, head=lambda req, resp: resp)
+        Client(head).head()
+        self.assertEqual(self.calls, [])
+
+    def test_options_returns_allowed_methods_without_controller(self):
+        response = self.client.options()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Allow'], 'GET, POST, HEAD, OPTIONS')
+        self.assertEqual(self.calls, [])
+
+    def test_options_uses_options_controller_if_given(self):
+        endpoint = Endpoint(get=self.controller, options=self.controller)
+        Client(endpoint).options()
+        self.assertEqual(self.calls, ['OPTIONS'])
+
+    def test_method_not_allowed_includes_allow_header(self):
+        response = self.client.put()
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response.headers['Allow'], 'GET, POST, HEAD, OPTIONS')
+        response = self.client.request('/', 'TRACE')
+        self.assertEqual(response.headers['Allow'], 'GET, POST, HEAD, OPTIONS')
+
+
+class TestEndpointConditionalRequests(TestCase):
+    def setUp(self):
+        self.calls = []
+
+    def controller(self, request, response):
+        self.calls.append('controller')
+        response.write('body')
+        return response
+
+    def validator(self, request, response):
+        self.calls.append('validator')
+        response.etag = 'v1'
+        return response
+
+    def test_hashes_body_for_etag_if_asked(self):
+        client = Client(Endpoint(get=self.controller, etag=True))
+        etag = client.get().etag
+        self.assertTrue(etag)
+        response = client.get(headers={'If-None-Match': '"%s"' % etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.body, b'')
+
+    def test_returns_full_response_if_etag_does_not_match(self):
+        client = Client(Endpoint(get=self.controller, etag=True))
+        response = client.get(headers={'If-None-Match': '"stale"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.body, b'body')
+
+    def test_uses_last_modified_set_by_controller(self):
+        def controller(request, response):
+            response.last_modified = 1000000000
+            return response
+        client = Client(Endpoint(get=controller))
+        response = client.get(headers={
+            'If-Modified-Since': 'Sun, 09 Sep 2001 01:46:40 GMT'})
+        self.assertEqual(response.status_code, 304)
+
+    def test_skips_controller_when_validator_matches(self):
+        client = Client(
+            Endpoint(get=self.controller, validator=self.validator))
+        response = client.get(headers={'If-None-Match': '"v1"'})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.etag, 'v1')
+        self.assertEqual(self.calls, ['validator'])
+
+    def test_calls_controller_when_validator_does_not_match(self):
+        client = Client(
+            Endpoint(get=self.controller, validator=self.validator))
+        response = client.get(headers={'If-None-Match': '"v0"'})
+        self.assertEqual(response.body, b'body')
+        self.assertEqual(response.etag, 'v1')
+        self.assertEqual(self.calls, ['validator', 'controller'])
+
+    def test_awaits_async_validators(self):
+        async def validator(request, response):
+            return self.validator(request, response)
+
+        router = Router()
+        router.add('/', get=self.controller, validator=validator)
+        for client in (Client(router), Client(router.asgi)):
+            response = client.get(headers={'If-None-Match': '"v1"'})
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(client.get().body, b'body')
+        self.assertEqual(self.calls.count('controller'), 2)
+
+    def test_does_not_validate_other_methods(self):
+        client = Client(
+            Endpoint(post=self.controller, validator=self.validator))
+        client.post()
+        self.assertEqual(self.calls, ['controller'])
+
+
+class TestEndpointMethodDispatch(TestCase):
+    def setUp(self):
+        self.calls = []
+
+    def controller(self, request, response):
+        self.calls.append(request.method)
+        return response
+
+    def test_routes_custom_methods_to_their_controllers(self):
+        endpoint = Endpoint(get=self.controller,
+                            methods={'PURGE': self.controller})
+        response = Client(endpoint).request('/', 'PURGE')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.calls, ['PURGE'])
+        self.assertEqual(endpoint.allow, 'GET, HEAD, PURGE, OPTIONS')
+
+    def test_rejects_methods_without_building_request(self):
+        endpoint = Endpoint(get=self.controller)
+        environ = {'REQUEST_METHOD': 'PROPFIND'}
+        start_response = Mock()
+
+        body = endpoint(environ, start_response)
+
+        self.assertEqual(body, [b'PROPFIND is not allowed\n'])
+        verify(start_response).called_with('405 Method Not Allowed', [
+            ('Content-Type', 'text/plain; charset=UTF-8'),
+            ('Allow', 'GET, HEAD, OPTIONS'),
+            ('Content-Length', '24'),
+        ])
+        self.assertNotIn('woma.request', environ)
+        self.assertEqual(self.calls, [])
+
+    def test_rejects_custom_methods_even_with_a_default_controller(self):
+        response = Client(Endpoint(self.controller)).request('/', 'PURGE')
+        self.assertEqual(response.status_code, 405)
+
+    def test_sends_static_responses_without_building_request(self):
+        endpoint = Endpoint(get=StaticResponse(200, 'static'))
+        environ = {'REQUEST_METHOD': 'GET'}
+        self.assertEqual(endpoint(environ, Mock()), [b'static'])
+        self.assertNotIn('woma.request', environ)
+
+    def test_runs_static_responses_through_middleware(self):
+        def tag(handler):
+            def tagged(request, response):
+                response = handler(request, response)
+                response.write(' tagged')
+                return response
+            return tagged
+        endpoint = Endpoint(get=StaticResponse(200, 'static'),
+                            middleware=[tag])
+        self.assertEqual(Client(endpoint).get().text, 'static tagged')
+
+
+class TestEndpointRequestLifetime(TestCase):
+    def setUp(self):
+        self.requests = []
+        gc.disable()
+        self.addCleanup(gc.enable)
+
+    def controller(self, request, response):
+        self.requests.append(weakref.ref(request))
+        return response
+
+    def test_frees_request_without_the_cyclic_gc(self):
+        environ = {'REQUEST_METHOD': 'GET'}
+        Endpoint(get=self.controller)(environ, Mock())
+        self.assertNotIn('woma.request', environ)
+        del environ
+        self.assertIsNone(self.requests[0]())
+
+    def test_frees_request_when_controller_raises(self):
+        def controller(request, response):
+            self.controller(request, response)
+            raise ValueError
+
+        environ = {'REQUEST_METHOD': 'GET'}
+        with self.assertRaises(ValueError):
+            Endpoint(get=controller)(environ, Mock())
+        self.assertNotIn('woma.request', environ)
@@ -0,0 +1,170 @@
+from unittest import TestCase
+
+from woma.index import RouteIndex
+
+
+class TestRouteIndexLookup(TestCase):
+    """index.lookup(path)"""
+
+    def setUp(self):
+        self.index = RouteIndex()
+
+    def test_returns_none_if_nothing_matches(self):
+        self.index.add('/foo', 'foo')
+        self.assertIsNone(self.index.lookup('/bar'))
+
+    def test_returns_value_and_empty_kwargs_for_static_path(self):
+        self.index.add('/foo/bar', 'foobar')
+        self.assertEqual(self.index.lookup('/foo/bar'), ('foobar', {}))
+
+    def test_does_not_match_partial_paths(self):
+        self.index.add('/foo/bar', 'foobar')
+        self.assertIsNone(self.index.lookup('/foo'))
+        self.assertIsNone(self.index.lookup('/foo/bar/baz'))
+
+    def test_captures_dynamic_segments(self):
+        self.index.add('/{one}/x/{two}', 'value')
+        self.assertEqual(
+            self.index.lookup('/1/x/2'), ('value', {'one': '1', 'two': '2'}))
+
+    def test_dynamic_segments_do_not_match_empty_segments(self):
+        self.index.add('/foo/{bar}', 'value')
+        self.assertIsNone(self.index.lookup('/foo/'))
+
+    def test_captures_placeholders_mixed_with_static_text(self):
+        self.index.add('/files/{name}.{ext}', 'value')
+        self.assertEqual(
+            self.index.lookup('/files/report.csv'),
+            ('value', {'name': 'report', 'ext': 'csv'}))
+
+    def test_static_text_is_not_treated_as_a_regex(self):
+        self.index.add('/foo.json', 'value')
+        self.assertIsNone(self.index.lookup('/fooxjson'))
+
+    def test_first_added_value_wins(self):
+        self.index.add('/articles/{article_id}', 'dynamic')
+        self.index.add('/articles/new', 'static')
+        self.assertEqual(
+            self.index.lookup('/articles/new'),
+            ('dynamic', {'article_id': 'new'}))
+
+    def test_static_value_added_first_wins(self):
+        self.index.add('/articles/new', 'static')
+        self.index.add('/articles/{article_id}', 'dynamic')
+        self.assertEqual(self.index.lookup('/articles/new'), ('static', {}))
+
+    def test_backtracks_to_later_branches(self):
+        self.index.add('/a/b/c', 'static')
+        self.index.add('/a/{x}/d', 'dynamic')
+        self.assertEqual(self.index.lookup('/a/b/d'), ('dynamic', {'x': 'b'}))
+
+    def test_first_match_across_branches_wins(self):
+        self.index.add('/{x}/b', 'first')
+        self.index.add('/a/{y}', 'second')
+        self.assertEqual(self.index.lookup('/a/b'), ('first', {'x': 'a'}))
+
+    def test_converts_typed_segments(self):
+        self.index.add('/articles/{article_id:int}', 'value')
+        self.assertEqual(
+            self.index.lookup('/articles/3'), ('value', {'article_id': 3}))
+
+    def test_typed_segments_only_match_their_type(self):
+        self.index.add('/articles/{article_id:int}', 'by id')
+        self.index.add('/articles/{slug}', 'by slug')
+        self.assertEqual(
+            self.index.lookup('/articles/new'), ('by slug', {'slug': 'new'}))
+
+    def test_uuid_segments(self):
+        value = '6fa459ea-ee8a-3ca4-894e-db77e160355e'
+        self.index.add('/things/{id:uuid}', 'thing')
+        self.assertIsNone(self.index.lookup('/things/123'))
+        self.assertEqual(str(self.index.lookup('/things/' + value)[1]['id']),
+                         value)
+
+    def test_path_segments_match_the_rest_of_the_path(self):
+        self.index.add('/files/{rest:path}', 'files')
+        self.assertEqual(
+            self.index.lookup('/files/a/b/c.txt'),
+            ('files', {'rest': 'a/b/c.txt'}))
+        self.assertIsNone(self.index.lookup('/files/'))
+
+    def test_path_segments_followed_by_static_segments(self):
+        self.index.add('/files/{rest:path}/edit', 'edit')
+        self.assertEqual(
+            self.index.lookup('/files/a/b/edit'), ('edit', {'rest': 'a/b'}))
+        self.assertIsNone(self.index.lookup('/files/a/b'))
+
+    def test_path_segments_keep_registration_order(self):
+        self.index.add('/files/{rest:path}', 'path')
+        self.index.add('/files/{name}', 'name')
+        self.assertEqual(
+            self.index.lookup('/files/a'), ('path', {'rest': 'a'}))
+
+    def test_earlier_match_wins_over_later_value_under_earlier_node(self):
+        self.index.add('/{x}/{y}.json', 'nested')
+        self.index.add('/{n}.json', 'json')
+        self.index.add('/{z}', 'any')
+        self.assertEqual(
+            self.index.lookup('/z.json'), ('json', {'n': 'z'}))
+
+    def test_earlier_typed_match_wins_over_later_value_under_earlier_node(
+            self):
+        self.index.add('/{x}/comments', 'comments')
+        self.index.add('/{y:int}', 'int')
+        self.index.add('/{x}', 'any')
+        self.assertEqual(self.index.lookup('/3'), ('int', {'y': 3}))
+
+
+class TestRouteIndexCovering(TestCase):
+    """index.covering(path)"""
+
+    def setUp(self):
+        self.index = RouteIndex()
+
+    def test_returns_value_for_the_same_pattern(self):
+        self.index.add('/articles/{id:int}', 'article')
+        self.assertEqual(self.index.covering('/articles/{pk:int}'), 'article')
+
+    def test_returns_value_for_a_more_general_pattern(self):
+        self.index.add('/articles/{slug}', 'slug')
+        self.assertEqual(self.index.covering('/articles/{id:int}'), 'slug')
+        self.assertEqual(self.index.covering('/articles/new'), 'slug')
+
+    def test_returns_None_for_a_more_specific_pattern(self):
+        self.index.add('/articles/{id:int}', 'article')
+        self.assertIsNone(self.index.covering('/articles/{slug}'))
+
+    def test_returns_the_earliest_covering_value(self):
+        self.index.add('/{x}/comments', 'comments')
+        self.index.add('/{y:int}', 'int')
+        self.index.add('/{x}', 'any')
+        self.assertEqual(self.index.covering('/{id:int}'), 'int')
+
+    def test_path_segments_cover_the_rest_of_the_path(self):
+        self.index.add('/files/{rest:path}', 'files')
+        self.assertEqual(self.index.covering('/files/{a}/{b}'), 'files')
+        self.assertIsNone(self.index.covering('/files'))
+
+
+class TestRouteIndexLoad(TestCase):
+    """RouteIndex.load(index.dump(dump_value), load_value)"""
+
+    def setUp(self):
+        self.index = RouteIndex()
+        self.index.add('/articles/{id:int}', 'article')
+        self.index.add('/articles/{slug}', 'slug')
+        self.index.add('/articles/{name}.json', 'json')
+        self.index.add('/files/{rest:path}', 'files')
+        self.index.add('/about', 'about')
+
+    def test_finds_the_same_values(self):
+        index = RouteIndex.load(self.index.dump())
+        for path in ('/articles/3', '/articles/new', '/articles/a.json',
+                     '/files/a/b', '/about', '/nothing'):
+            self.assertEqual(index.lookup(path), self.index.lookup(path))
+        self.assertEqual(len(index), 5)
+
+    def test_dumps_and_loads_values(self):
+        index = RouteIndex.load(self.index.dump(str.upper), str.lower)
+        self.assertEqual(index.lookup('/about'), ('about', {}))
+        self.assertIn("'ABOUT'", repr(self.index.dump(str.upper)))
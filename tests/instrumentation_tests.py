@@ -0,0 +1,78 @@
+from unittest import TestCase
+
+from woma.endpoints import Endpoint
+from woma.http import Client
+from woma.instrumentation import Span, Spans
+from woma.router import Router
+
+
+def controller(request, response):
+    response.write('hello')
+    return response
+
+
+class TestRouterHooks(TestCase):
+    def setUp(self):
+        self.spans = []
+        self.router = Router()
+        self.router.add('/hello/{name}', get=controller)
+        self.router.add_hook(self.spans.append)
+
+    def test_emits_spans_for_each_part_of_the_request(self):
+        Client(self.router).get('/hello/World').body
+        names = [span.name for span in self.spans]
+        self.assertEqual(names, ['route', 'request', 'controller', 'response'])
+
+    def test_tags_spans_with_route_path(self):
+        Client(self.router).get('/hello/World').body
+        routes = set(span.route for span in self.spans)
+        self.assertEqual(routes, {'/hello/{name}'})
+
+    def test_emits_spans(self):
+        Client(self.router).get('/hello/World').body
+        for span in self.spans:
+            self.assertIsInstance(span, Span)
+            self.assertGreaterEqual(span.duration, 0)
+
+    def test_tags_unmatched_paths_with_default_route_path(self):
+        Client(self.router).get('/asdf').body
+        first = self.spans[0]
+        self.assertEqual((first.name, first.route), ('route', None))
+
+
+class TestEndpointHooks(TestCase):
+    def test_emits_spans_for_endpoint_hooks(self):
+        spans = []
+        endpoint = Endpoint(controller)
+        endpoint.add_hook(spans.append)
+        Client(endpoint).get().body
+        names = [span.name for span in spans]
+        self.assertEqual(names, ['request', 'controller', 'response'])
+
+    def test_calls_router_and_endpoint_hooks(self):
+        router_spans, endpoint_spans = [], []
+        endpoint = Endpoint(controller)
+        endpoint.add_hook(endpoint_spans.append)
+        router = Router()
+        router.map_endpoint('/foo', endpoint)
+        router.add_hook(router_spans.append)
+
+        Client(router).get('/foo').body
+
+        self.assertEqual(len(router_spans), 4)
+        self.assertEqual(len(endpoint_spans), 3)
+
+
+class TestSpansForEnviron(TestCase):
+    """Spans.for_environ(environ, hooks)"""
+
+    def test_returns_none_without_hooks(self):
+        self.assertIsNone(Spans.for_environ({}, []))
+
+    def test_wrapped_response_emits_span_once_when_closed(self):
+        spans = []
+        tracker = Spans.for_environ({}, [spans.append])
+        app_iter = tracker.wrap([b'a', b'b'], 'response')
+        self.assertEqual(list(app_iter), [b'a', b'b'])
+        app_iter.close()
+        self.assertEqual([span.name for span in spans], ['response'])
@@ -0,0 +1,118 @@
+from unittest import TestCase
+
+from woma.endpoints import Endpoint
+from woma.http import Client, Request, Response
+from woma.middleware import compose
+from woma.router import Router
+
+
+def controller(request, response):
+    response.write('controller')
+    return response
+
+
+def tag(name, calls=None):
+    """Middleware that records its composition and adds to the body."""
+    def middleware(handler):
+        if calls is not None:
+            calls.append(name)
+
+        def tagged(request, response):
+            response = handler(request, response)
+            response.write(' ' + name)
+            return response
+        return tagged
+    return middleware
+
+
+class TestCompose(TestCase):
+    """compose(middleware, controller)"""
+
+    def test_returns_controller_without_middleware(self):
+        self.assertIs(compose([], controller), controller)
+
+    def test_first_middleware_is_outermost(self):
+        handler = compose([tag('outer'), tag('inner')], controller)
+        response = handler(None, _response())
+        self.assertEqual(response.text, 'controller inner outer')
+
+
+class TestEndpointMiddleware(TestCase):
+    def test_wraps_controllers_in_middleware(self):
+        endpoint = Endpoint(get=controller, middleware=[tag('a')])
+        self.assertEqual(Client(endpoint).get().text, 'controller a')
+
+    def test_wraps_default_controller_in_middleware(self):
+        endpoint = Endpoint(controller, middleware=[tag('a')])
+        self.assertEqual(Client(endpoint).put().text, 'controller a')
+
+    def test_does_not_run_middleware_for_methods_not_allowed(self):
+        endpoint = Endpoint(get=controller, middleware=[tag('a')])
+        self.assertEqual(Client(endpoint).put().text, 'PUT is not allowed\n')
+
+    def test_use_adds_middleware(self):
+        endpoint = Endpoint(get=controller, middleware=[tag('a')])
+        endpoint.use(tag('b'))
+        self.assertEqual(Client(endpoint).get().text, 'controller b a')
+
+    def test_composes_middleware_once(self):
+        calls = []
+        endpoint = Endpoint(get=controller, middleware=[tag('a', calls)])
+        Client(endpoint).get()
+        Client(endpoint).get()
+        # once for each allowed method
+        allowed = endpoint.allow.split(', ')
+        self.assertEqual(calls, ['a'] * len(allowed))
+
+
+class TestRouterMiddleware(TestCase):
+    def setUp(self):
+        self.router = Router()
+        self.client = Client(self.router)
+
+    def test_wraps_endpoints_added_before_and_after(self):
+        self.router.add('/before', get=controller)
+        self.router.use(tag('a'))
+        self.router.add('/after', get=controller)
+
+        self.assertEqual(self.client.get('/before').text, 'controller a')
+        self.assertEqual(self.client.get('/after').text, 'controller a')
+
+    def test_wraps_endpoint_middleware(self):
+        self.router.add('/foo', get=controller, middleware=[tag('endpoint')])
+        self.router.use(tag('router'))
+        self.assertEqual(
+            self.client.get('/foo').text, 'controller endpoint router')
+
+    def test_wraps_not_found(self):
+        self.router.use(tag('a'))
+        self.assertEqual(
+            self.client.get('/asdf').text, "We can't find /asdf\n a")
+
+    def test_does_not_leak_into_endpoints_shared_with_other_routers(self):
+        endpoint = Endpoint(get=controller)
+        self.router.map_endpoint('/foo', endpoint)
+        self.router.use(tag('a'))
+        other_router = Router()
+        other_router.map_endpoint('/foo', endpoint)
+
+        self.assertEqual(self.client.get('/foo').text, 'controller a')
+        self.assertEqual(Client(other_router).get('/foo').text, 'controller')
+        self.assertEqual(Client(endpoint).get('/foo').text, 'controller')
+
+    def test_finalize_composes_middleware_up_front(self):
+        calls = []
+        self.router.add('/foo', get=controller)
+        self.router.use(tag('a', calls))
+        self.router.finalize()
+        composed = len(calls)
+
+        self.client.get('/foo')
+        self.client.get('/foo')
+
+        self.assertGreater(composed, 0)
+        self.assertEqual(len(calls), composed)
+
+
+def _response():
+    return Response.for_request(Request({}))
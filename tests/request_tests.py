@@ -1,6 +1,11 @@
+import io
 from unittest import TestCase
 
-from woma.http import Request
+from webob import Request as WebobRequest
+
+from woma.exceptions import RequestTooLarge
+from woma.http import Request, request_path
+from woma.serializers import Serializer
 
 
 class TestRequest(TestCase):
@@ -11,3 +16,88 @@ class TestRequest(TestCase):
     def test_kwargs_returns_router_kwargs_from_environ(self):
         request = Request({'router.kwargs': {'foo': 'bar'}})
         self.assertEqual(request.kwargs, {'foo': 'bar'})
+
+
+class TestRequestFromEnviron(TestCase):
+    """Request.from_environ(environ)"""
+
+    def test_creates_request_for_environ(self):
+        environ = {'PATH_INFO': '/foo'}
+        request = Request.from_environ(environ)
+        self.assertIs(request.environ, environ)
+
+    def test_reuses_request_already_created_for_environ(self):
+        environ = {}
+        request = Request.from_environ(environ)
+        self.assertIs(Request.from_environ(environ), request)
+
+
+class TestRequestPath(TestCase):
+    """request_path(environ)"""
+
+    def assertMatchesWebob(self, environ):
+        self.assertEqual(request_path(environ), WebobRequest(environ).path)
+
+    def test_joins_script_name_and_path_info(self):
+        self.assertMatchesWebob({'SCRIPT_NAME': '/app', 'PATH_INFO': '/foo'})
+
+    def test_defaults_to_empty_path(self):
+        self.assertEqual(request_path({}), '')
+
+    def test_quotes_unsafe_characters(self):
+        self.assertMatchesWebob({'PATH_INFO': '/foo bar/[baz]'})
+
+    def test_quotes_non_ascii_characters(self):
+        path_info = '/caf\u00e9'.encode('utf-8').decode('latin-1')
+        self.assertMatchesWebob({'PATH_INFO': path_info})
+
+
+class TestRequestJson(TestCase):
+    """request.json"""
+
+    def request(self, body):
+        return Request.blank('/', POST=body)
+
+    def test_parses_body_as_json(self):
+        self.assertEqual(self.request(b'{"a": [1, 2]}').json, {'a': [1, 2]})
+
+    def test_parses_body_once(self):
+        calls = []
+        request = self.request(b'{}')
+        request.json_serializer = Serializer(
+            'test', lambda body: calls.append(body) or {}, None)
+        request.json
+        request.json
+        self.assertEqual(calls, [b'{}'])
+
+    def test_raises_RequestTooLarge_for_large_bodies(self):
+        request = self.request(b'[1, 2, 3]')
+        request.max_json_size = 8
+        with self.assertRaises(RequestTooLarge):
+            request.json
+
+    def chunked_request(self, body):
+        self.input = io.BytesIO(body)
+        request = Request.blank('/', method='POST')
+        request.environ.update({
+            'wsgi.input': self.input,
+            'wsgi.input_terminated': True,
+        })
+        request.environ.pop('CONTENT_LENGTH', None)
+        return request
+
+    def test_parses_bodies_without_content_length(self):
+        request = self.chunked_request(b'[1, 2, 3]')
+        self.assertEqual(request.json, [1, 2, 3])
+        self.assertEqual(request.body, b'[1, 2, 3]')
+
+    def test_reads_no_more_than_the_limit_without_content_length(self):
+        request = self.chunked_request(b'[' + b'1, ' * 1000 + b'1]')
+        request.max_json_size = 8
+        with self.assertRaises(RequestTooLarge):
+            request.json
+        self.assertEqual(self.input.tell(), 9)
+
+    def test_raises_ValueError_for_invalid_json(self):
+        with self.assertRaises(ValueError):
+            self.request(b'{nope').json
@@ -1,6 +1,10 @@
+import json
 from unittest import TestCase
 
-from woma.http import Request, Response
+from tdubs import Mock, verify
+
+from woma import serializers
+from woma.http import Request, Response, StaticResponse
 
 
 class TestResponseForRequest(TestCase):
@@ -30,3 +34,158 @@ class TestResponseForRequest(TestCase):
         self.request.headers['Content-Type'] = 'text/plain; charset=ascii'
         response = Response.for_request(self.request)
         self.assertEqual(response.charset, 'ascii')
+
+
+class TestResponseWrite(TestCase):
+    """response.write(text)"""
+
+    def setUp(self):
+        self.response = Response.for_request(Request({}))
+
+    def test_appends_text_to_body(self):
+        self.response.write('one ')
+        self.response.write('two')
+        self.assertEqual(self.response.body, b'one two')
+
+    def test_accepts_bytes(self):
+        self.response.write(b'bytes')
+        self.assertEqual(self.response.body, b'bytes')
+
+    def test_keeps_content_length_up_to_date(self):
+        self.response.write('one ')
+        self.response.write('two')
+        self.assertEqual(self.response.content_length, 7)
+
+    def test_appends_to_streamed_body_without_consuming_it(self):
+        consumed = []
+
+        def chunks():
+            consumed.append(True)
+            yield 'streamed '
+
+        self.response.stream(chunks())
+        self.response.write('written')
+
+        self.assertEqual(consumed, [])
+        self.assertEqual(self.response.body, b'streamed written')
+
+
+class TestResponseStream(TestCase):
+    """response.stream(chunks)"""
+
+    def setUp(self):
+        self.response = Response.for_request(Request({}))
+
+    def test_streams_chunks_to_the_server_one_at_a_time(self):
+        self.response.stream(iter(['one', 'two']))
+        app_iter = self.response({'REQUEST_METHOD': 'GET'}, Mock())
+        self.assertEqual(list(app_iter), [b'one', b'two'])
+
+    def test_removes_content_length(self):
+        self.response.write('old body')
+        self.response.stream(iter(['new body']))
+        self.assertIsNone(self.response.content_length)
+
+    def test_uses_given_content_length(self):
+        self.response.stream(iter(['12345']), content_length=5)
+        self.assertEqual(self.response.content_length, 5)
+
+    def test_closes_chunks_when_closed(self):
+        closed = []
+
+        def chunks():
+            try:
+                yield 'one'
+                yield 'two'
+            finally:
+                closed.append(True)
+
+        self.response.stream(chunks())
+        app_iter = self.response.app_iter
+        next(app_iter)
+        app_iter.close()
+        self.assertEqual(closed, [True])
+
+    def test_closes_chunks_when_closed_after_write(self):
+        closed = []
+
+        def chunks():
+            try:
+                yield 'one'
+                yield 'two'
+            finally:
+                closed.append(True)
+
+        self.response.stream(chunks())
+        self.response.write('three')
+        app_iter = self.response.app_iter
+        next(app_iter)
+        app_iter.close()
+        self.assertEqual(closed, [True])
+
+
+class TestResponseWriteJson(TestCase):
+    """response.write_json(obj)"""
+
+    def setUp(self):
+        self.response = Response.for_request(Request({}))
+        self.response.write('replaced')
+        self.response.write_json({'name': 'Wörld', 'ids': [1, 2]})
+
+    def test_replaces_body_with_json(self):
+        self.assertEqual(json.loads(self.response.body.decode('utf-8')),
+                         {'name': 'Wörld', 'ids': [1, 2]})
+        self.assertEqual(self.response.content_length,
+                         len(self.response.body))
+
+    def test_sets_json_content_type(self):
+        self.assertEqual(self.response.content_type, 'application/json')
+
+
+class TestSerializers(TestCase):
+    def test_stdlib_serializer_round_trips_through_bytes(self):
+        obj = {'name': 'Wörld', 'ids': [1, 2]}
+        data = serializers.STDLIB.dumps(obj)
+        self.assertIsInstance(data, bytes)
+        self.assertEqual(serializers.STDLIB.loads(data), obj)
+
+    def test_default_serializer_round_trips_through_bytes(self):
+        obj = {'name': 'Wörld', 'ids': [1, 2]}
+        self.assertEqual(
+            serializers.JSON.loads(serializers.JSON.dumps(obj)), obj)
+
+
+class TestStaticResponse(TestCase):
+    """StaticResponse(status, body, headers, content_type)"""
+
+    def call(self, static, method='GET', path='/things'):
+        environ = {'REQUEST_METHOD': method, 'PATH_INFO': path}
+        start_response = Mock()
+        body = static(environ, start_response)
+        return start_response, body
+
+    def test_writes_prerendered_response(self):
+        static = StaticResponse(410, 'gone', [('X-Test', 'yes')])
+        start_response, body = self.call(static)
+        self.assertEqual(body, [b'gone'])
+        verify(start_response).called_with('410 Gone', [
+            ('Content-Type', 'text/plain; charset=UTF-8'),
+            ('X-Test', 'yes'),
+            ('Content-Length', '4'),
+        ])
+
+    def test_fills_in_path_and_method(self):
+        static = StaticResponse(404, '{method} {path}?')
+        _, body = self.call(static, 'POST', '/big things')
+        self.assertEqual(body, [b'POST /big%20things?'])
+
+    def test_sends_no_body_for_head_requests(self):
+        _, body = self.call(StaticResponse(200, 'ok'), 'HEAD')
+        self.assertEqual(body, [])
+
+    def test_can_be_used_as_a_controller(self):
+        request = Request({'REQUEST_METHOD': 'GET', 'PATH_INFO': '/x'})
+        response = StaticResponse(404, 'no {path}').controller(
+            request, Response.for_request(request))
+        self.assertEqual(response.status, '404 Not Found')
+        self.assertEqual(response.text, 'no /x')
@@ -1,6 +1,7 @@
 from unittest import TestCase
 
-from woma.router import Route
+from woma.exceptions import BuildError
+from woma.router import Route, RouteMatch
 
 
 class TestRoute(TestCase):
@@ -19,19 +20,65 @@ class TestRoute(TestCase):
 class TestRouteMatch(TestCase):
     """route.match(path)"""
 
-    def test_returns_false_if_path_does_not_match_route_path(self):
+    def test_returns_none_if_path_does_not_match_route_path(self):
         route = Route('/foo', 'foo')
-        self.assertFalse(route.match('/bar'))
+        self.assertIsNone(route.match('/bar'))
 
-    def test_returns_true_if_path_matches_route_path(self):
+    def test_returns_match_for_route_if_path_matches_route_path(self):
         route = Route('/foo', 'foo')
-        self.assertTrue(route.match('/foo'))
+        self.assertEqual(route.match('/foo'), RouteMatch(route, {}))
 
     def test_matches_keyword_arguments(self):
         route = Route('/{foo}/{bar}', 'foobar')
         self.assertTrue(route.match('/fizz/buzz'))
 
-    def test_kwargs_are_added_to_matched_route(self):
+    def test_kwargs_are_added_to_the_match(self):
         route = Route('/{one}/{two}', 'foo')
-        route.match('/1/2')
-        self.assertEqual(route.kwargs, {'one': '1', 'two': '2'})
+        match = route.match('/1/2')
+        self.assertEqual(match.kwargs, {'one': '1', 'two': '2'})
+
+    def test_does_not_modify_the_route(self):
+        route = Route('/{one}', 'foo')
+        route.match('/1')
+        self.assertFalse(hasattr(route, 'kwargs'))
+
+    def test_converts_typed_keyword_arguments(self):
+        route = Route('/articles/{article_id:int}', 'foo')
+        self.assertEqual(route.match('/articles/3').kwargs, {'article_id': 3})
+        self.assertIsNone(route.match('/articles/new'))
+
+
+class TestRouteBuild(TestCase):
+    """route.build(**kwargs)"""
+
+    def test_returns_static_path(self):
+        self.assertEqual(Route('/foo/bar', 'foo').build(), '/foo/bar')
+
+    def test_fills_in_dynamic_segments(self):
+        route = Route('/{one}/x/{two:int}', 'foo')
+        self.assertEqual(route.build(one='a', two=2), '/a/x/2')
+
+    def test_quotes_values(self):
+        route = Route('/search/{query}', 'foo')
+        self.assertEqual(route.build(query='a b&c'), '/search/a%20b%26c')
+
+    def test_keeps_slashes_in_path_segments(self):
+        route = Route('/files/{rest:path}', 'foo')
+        self.assertEqual(route.build(rest='a/b c'), '/files/a/b%20c')
+
+    def test_raises_BuildError_for_missing_values(self):
+        with self.assertRaises(BuildError):
+            Route('/{one}/{two}', 'foo').build(one='a')
+
+    def test_raises_BuildError_for_values_that_do_not_fit_converter(self):
+        with self.assertRaises(BuildError):
+            Route('/{id:int}', 'foo').build(id='abc')
+
+    def test_raises_BuildError_for_slashes_in_single_segments(self):
+        with self.assertRaises(BuildError):
+            Route('/{name}', 'foo').build(name='a/b')
+
+    def test_built_paths_match_the_route(self):
+        route = Route('/things/{id:int}/{name}', 'foo')
+        path = route.build(id=7, name='seven')
+        self.assertEqual(route.match(path).kwargs, {'id': 7, 'name': 'seven'})
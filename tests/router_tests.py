@@ -2,8 +2,10 @@ from unittest import TestCase
 
 from tdubs import calling, verify, Mock, Stub
 
-from woma.router import Router, Route
+from woma.router import Router, Route, RouteMatch
 from woma.endpoints import Endpoint, not_found
+from woma.exceptions import RouteError
+from woma.http import Client
 
 
 class RouterTestCase(TestCase):
@@ -54,6 +56,13 @@ class TestRouterMapControllers(RouterTestCase):
         self.subject('/path', get=controller1, post=controller2)
         verify(self.routes.add).called_with(expected_route)
 
+    def test_accepts_route_name(self):
+        controller = object()
+        expected_endpoint = Endpoint(get=controller)
+        expected_route = Route('/path', expected_endpoint, 'the name')
+        self.subject('/path', get=controller, name='the name')
+        verify(self.routes.add).called_with(expected_route)
+
     def test_accepts_default_controller(self):
         """can also be called like: router.map_controllers(path, controller)"""
         controller = object()
@@ -72,6 +81,25 @@ class TestRouterMap(TestRouterMapControllers):
         return self.router.add
 
 
+class TestRouterMapEndpointWithName(RouterTestCase):
+    """router.map_endpoint(path, endpoint, name)"""
+
+    def test_adds_named_route_to_routes(self):
+        endpoint = Stub('endpoint')
+        expected_route = Route('/path', endpoint, 'the name')
+        self.router.map_endpoint('/path', endpoint, name='the name')
+        verify(self.routes.add).called_with(expected_route)
+
+
+class TestRouterUrlFor(RouterTestCase):
+    """router.url_for(name, **kwargs)"""
+
+    def test_returns_path_built_by_routes(self):
+        calling(self.routes.url_for).passing('article', id=3).returns(
+            '/articles/3')
+        self.assertEqual(self.router.url_for('article', id=3), '/articles/3')
+
+
 class TestRouterSetDefault(RouterTestCase):
     """router.setdefault(endpoint)"""
 
@@ -93,11 +121,12 @@ class TestRouterCall(RouterTestCase):
         self.environ = {'PATH_INFO': '/path'}
         start_response = Stub('start_response')
 
-        route = Stub('route', kwargs={'expected': 'kwargs'})
+        route = Stub('route')
         calling(route.endpoint).passing(self.environ, start_response).returns(
             'endpoint response')
 
-        calling(self.routes.get).passing('/path').returns(route)
+        match = RouteMatch(route, {'expected': 'kwargs'})
+        calling(self.routes.match).passing('/path').returns(match)
 
         self.response = self.router(self.environ, start_response)
 
@@ -106,3 +135,131 @@ class TestRouterCall(RouterTestCase):
 
     def test_returns_call_to_routes_endpoint(self):
         self.assertEqual(self.response, 'endpoint response')
+
+
+class TestRouterFreeze(TestCase):
+    """router.freeze(strict=False)"""
+
+    def setUp(self):
+        self.router = Router()
+        self.router.add('/articles/{slug}', get='slug')
+        self.router.add('/articles/{id:int}', get='typed')
+
+    def test_returns_report_of_routes_that_can_never_match(self):
+        report = self.router.freeze()
+        self.assertEqual([route.path for route, _ in report.shadowed],
+                         ['/articles/{id:int}'])
+
+    def test_raises_RouteError_for_unmatchable_routes_when_strict(self):
+        with self.assertRaises(RouteError):
+            self.router.freeze(strict=True)
+
+    def test_locks_the_routes(self):
+        self.router.freeze()
+        with self.assertRaises(RouteError):
+            self.router.add('/other', get='other')
+
+
+class TestRouterMount(TestCase):
+    """router.mount(prefix, router)"""
+
+    def setUp(self):
+        self.router = Router()
+        self.api = Router()
+        self.router.mount('/api/v2', self.api)
+        self.environs = []
+
+    def controller(self, request, response):
+        self.environs.append(request.environ)
+        response.write('%s %s' % (request.script_name, request.path_info))
+        return response
+
+    def test_routes_paths_below_prefix_to_mounted_router(self):
+        self.api.add('/articles/{id:int}', get=self.controller)
+        response = Client(self.router).get('/api/v2/articles/3')
+        self.assertEqual(response.text, '/api/v2 /articles/3')
+        self.assertEqual(self.environs[0]['router.kwargs'], {'id': 3})
+
+    def test_routes_the_prefix_to_the_mounted_root(self):
+        self.api.add('/', get=self.controller)
+        self.assertEqual(
+            Client(self.router).get('/api/v2').text, '/api/v2 ')
+        self.assertEqual(
+            Client(self.router).get('/api/v2/').text, '/api/v2 /')
+
+    def test_returns_not_found_for_unmatched_paths_below_prefix(self):
+        self.api.add('/articles', get=self.controller)
+        response = Client(self.router).get('/api/v2/comments')
+        self.assertEqual(response.status_code, 404)
+
+    def test_does_not_route_paths_outside_prefix(self):
+        self.api.add('/articles', get=self.controller)
+        response = Client(self.router).get('/api/v3/articles')
+        self.assertEqual(response.status_code, 404)
+
+    def test_adds_kwargs_from_a_dynamic_prefix(self):
+        self.router.mount('/tenants/{tenant}', self.api)
+        self.api.add('/articles/{id:int}', get=self.controller)
+        Client(self.router).get('/tenants/acme/articles/3')
+        self.assertEqual(self.environs[0]['router.kwargs'],
+                         {'tenant': 'acme', 'id': 3})
+
+    def test_outer_middleware_wraps_mounted_middleware(self):
+        def tag(name):
+            def middleware(handler):
+                def handle(request, response):
+                    response.write(name)
+                    return handler(request, response)
+                return handle
+            return middleware
+        self.router.use(tag('outer '))
+        self.api.use(tag('inner '))
+        self.api.add('/articles', get=lambda request, response: response)
+        self.router.finalize()
+
+        response = Client(self.router).get('/api/v2/articles')
+
+        self.assertEqual(response.text, 'outer inner ')
+
+    def test_raises_RouteError_for_a_prefix_ending_in_slash(self):
+        with self.assertRaises(RouteError):
+            self.router.mount('/api/', self.api)
+
+
+class TestRouterWarmup(TestCase):
+    """router.warmup()"""
+
+    def setUp(self):
+        self.calls = []
+        self.router = Router()
+        self.api = Router()
+        self.router.add('/', get=self.controller)
+        self.router.add('/articles/{id:int}', get='show', name='article')
+        self.router.add('/{rest:path}', self.controller)
+        self.router.mount('/api', self.api)
+        self.api.add('/things', get='things')
+        self.router.use(self.middleware)
+        self.router.add_hook(self.calls.append)
+        self.router.warmup()
+
+    def controller(self, request, response):
+        self.calls.append('controller')
+        return response
+
+    def middleware(self, handler):
+        def handle(request, response):
+            self.calls.append('middleware')
+            return handler(request, response)
+        return handle
+
+    def test_calls_no_controllers_middleware_or_hooks(self):
+        self.assertEqual(self.calls, [])
+
+    def test_does_not_compile_unused_route_patterns(self):
+        route = self.router.routes.names['article']
+        compiled = getattr(route, '_cached_properties', {})
+        self.assertNotIn('_path_regex', compiled)
+
+    def test_composes_middleware(self):
+        endpoint = self.router.routes.names['article'].endpoint
+        self.assertIn(id(self.router.middleware), endpoint._compiled)
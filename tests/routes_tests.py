@@ -1,7 +1,7 @@
 from unittest import TestCase
 
-from woma.exceptions import NotFound
-from woma.router import Route, Routes
+from woma.exceptions import BuildError, NotFound, RouteError
+from woma.router import Route, RouteMatch, Routes
 
 
 class TestRoutesGet(TestCase):
@@ -33,3 +33,225 @@ class TestRoutesGet(TestCase):
         routes = Routes()
         with self.assertRaises(NotFound):
             routes.get('/asdf')
+
+    def test_first_added_route_wins(self):
+        dynamic_route = Route('/articles/{article_id}', 'dynamic')
+        static_route = Route('/articles/new', 'static')
+
+        routes = Routes()
+        routes.add(dynamic_route)
+        routes.add(static_route)
+
+        self.assertEqual(routes.get('/articles/new'), dynamic_route)
+
+    def test_static_route_added_first_wins(self):
+        static_route = Route('/articles/new', 'static')
+        dynamic_route = Route('/articles/{article_id}', 'dynamic')
+
+        routes = Routes()
+        routes.add(static_route)
+        routes.add(dynamic_route)
+
+        self.assertEqual(routes.get('/articles/new'), static_route)
+
+    def test_first_of_duplicate_static_routes_wins(self):
+        first_route = Route('/foo', 'first')
+        routes = Routes()
+        routes.add(first_route)
+        routes.add(Route('/foo', 'second'))
+
+        self.assertEqual(routes.get('/foo'), first_route)
+
+    def test_returns_route_for_dynamic_path(self):
+        expected_route = Route('/articles/{article_id}', 'article')
+        routes = Routes()
+        routes.add(Route('/articles', 'articles'))
+        routes.add(expected_route)
+
+        self.assertEqual(routes.get('/articles/3'), expected_route)
+
+
+class TestRoutesMatch(TestCase):
+    """routes.match(path)"""
+
+    def test_returns_route_and_kwargs_for_the_path(self):
+        route = Route('/articles/{article_id}', 'article')
+        routes = Routes()
+        routes.add(route)
+
+        match = routes.match('/articles/3')
+
+        self.assertEqual(match, RouteMatch(route, {'article_id': '3'}))
+
+    def test_returns_a_new_kwargs_dict_for_static_routes(self):
+        routes = Routes()
+        routes.add(Route('/foo', 'foo'))
+        routes.match('/foo').kwargs['changed'] = True
+        self.assertEqual(routes.match('/foo').kwargs, {})
+
+    def test_returns_a_new_match_for_each_path(self):
+        routes = Routes()
+        routes.add(Route('/articles/{article_id}', 'article'))
+
+        match1 = routes.match('/articles/1')
+        match2 = routes.match('/articles/2')
+
+        self.assertEqual(match1.kwargs, {'article_id': '1'})
+        self.assertEqual(match2.kwargs, {'article_id': '2'})
+
+    def test_returns_default_route_without_kwargs_if_no_path_matches(self):
+        default = Route(path=None, endpoint='404 endpoint')
+        routes = Routes()
+        routes.setdefault(default)
+
+        self.assertEqual(routes.match('/asdf'), RouteMatch(default, {}))
+
+    def test_raises_NotFound_if_no_matching_path_and_no_set_default(self):
+        routes = Routes()
+        with self.assertRaises(NotFound):
+            routes.match('/asdf')
+
+
+class TestRoutesUrlFor(TestCase):
+    """routes.url_for(name, **kwargs)"""
+
+    def setUp(self):
+        self.routes = Routes()
+        self.routes.add(Route('/articles/{id:int}', 'article', 'article'))
+
+    def test_builds_path_for_named_route(self):
+        self.assertEqual(self.routes.url_for('article', id=3), '/articles/3')
+
+    def test_raises_BuildError_for_unknown_name(self):
+        with self.assertRaises(BuildError):
+            self.routes.url_for('nope')
+
+    def test_raises_RouteError_when_adding_a_duplicate_name(self):
+        with self.assertRaises(RouteError):
+            self.routes.add(Route('/other', 'other', 'article'))
+
+
+class TestRoutesFreeze(TestCase):
+    """routes.freeze()"""
+
+    def setUp(self):
+        self.routes = Routes()
+        self.slug = Route('/articles/{slug}', 'slug')
+        self.routes.add(self.slug)
+
+    def test_reports_nothing_when_every_route_can_match(self):
+        self.routes.add(Route('/articles/{slug}/comments', 'comments'))
+        report = self.routes.freeze()
+        self.assertFalse(report)
+        self.assertEqual(report, ([], []))
+
+    def test_reports_duplicate_routes(self):
+        static = Route('/about', 'about')
+        self.routes.add(static)
+        again = Route('/articles/{other}', 'again')
+        static_again = Route('/about', 'about again')
+        self.routes.add(again)
+        self.routes.add(static_again)
+
+        report = self.routes.freeze()
+
+        self.assertEqual(report.duplicates,
+                         [(again, self.slug), (static_again, static)])
+
+    def test_reports_routes_shadowed_by_earlier_routes(self):
+        typed = Route('/articles/{id:int}', 'typed')
+        static = Route('/articles/new', 'new')
+        self.routes.add(typed)
+        self.routes.add(static)
+
+        report = self.routes.freeze()
+
+        self.assertEqual(report.shadowed,
+                         [(typed, self.slug), (static, self.slug)])
+
+    def test_still_matches_the_first_route_added(self):
+        self.routes.add(Route('/articles/{id:int}', 'typed'))
+        self.routes.freeze()
+        self.assertEqual(self.routes.get('/articles/3'), self.slug)
+
+    def test_raises_RouteError_when_adding_after_freezing(self):
+        self.routes.freeze()
+        with self.assertRaises(RouteError):
+            self.routes.add(Route('/other', 'other'))
+
+
+class TestRoutesCache(TestCase):
+    """Routes(cache_size)"""
+
+    def setUp(self):
+        self.routes = Routes(cache_size=2)
+        self.route = Route('/articles/{id:int}', 'article')
+        self.routes.add(self.route)
+
+    def test_returns_cached_match_for_repeat_paths(self):
+        self.routes.match('/articles/1')
+        self.routes.match('/articles/1')
+        match = self.routes.match('/articles/1')
+        self.assertEqual(match, RouteMatch(self.route, {'id': 1}))
+        self.assertEqual((self.routes.hits, self.routes.misses), (1, 2))
+
+    def test_one_off_paths_do_not_evict_cached_paths(self):
+        for _ in range(2):
+            self.routes.match('/articles/1')
+        for i in range(100, 110):
+            self.routes.match('/articles/%d' % i)
+        self.routes.match('/articles/1')
+        self.assertEqual(self.routes.hits, 1)
+
+    def test_returns_a_new_kwargs_dict_for_each_match(self):
+        self.routes.match('/articles/1').kwargs['changed'] = True
+        self.assertEqual(self.routes.match('/articles/1').kwargs, {'id': 1})
+
+    def test_does_not_cache_unmatched_paths(self):
+        self.routes.setdefault(Route(None, 'not found'))
+        self.routes.match('/nope')
+        self.assertEqual(len(self.routes._cache), 0)
+
+    def test_evicts_least_recently_used_paths(self):
+        for path in ('/articles/1', '/articles/2', '/articles/3'):
+            self.routes.match(path)
+            self.routes.match(path)
+        self.routes.match('/articles/1')
+        self.routes.match('/articles/3')
+        self.assertEqual(self.routes.hits, 1)
+        self.assertEqual(len(self.routes._cache), 2)
+
+    def test_clears_cache_when_routes_are_added(self):
+        self.routes.match('/articles/1')
+        first = Route('/articles/1', 'first')
+        self.routes.add(first)
+        # static routes added later lose to earlier dynamic routes
+        self.assertEqual(self.routes.get('/articles/1'), self.route)
+        self.assertEqual(self.routes.misses, 2)
+
+
+class TestRoutesLoad(TestCase):
+    """Routes.load(routes, routes.dump())"""
+
+    def setUp(self):
+        self.routes = Routes()
+        self.routes.add(Route('/posts/{slug}', 'by slug', name='post'))
+        self.routes.add(Route('/posts/{id:int}', 'by id'))
+        self.routes.add(Route('/about', 'about'))
+
+    def load(self):
+        routes = [Route(route.path, route.endpoint.upper(), route.name)
+                  for route in self.routes.routes]
+        return Routes.load(routes, self.routes.dump())
+
+    def test_matches_the_loaded_routes(self):
+        routes = self.load()
+        self.assertEqual(routes.match('/posts/3'),
+                         RouteMatch(routes.routes[0], {'slug': '3'}))
+        self.assertEqual(routes.get('/about').endpoint, 'ABOUT')
+        self.assertEqual(routes.url_for('post', slug='new'), '/posts/new')
+
+    def test_keeps_routes_frozen(self):
+        self.routes.freeze()
+        with self.assertRaises(RouteError):
+            self.load().add(Route('/contact', 'contact'))
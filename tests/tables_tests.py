@@ -0,0 +1,211 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from woma.controllers import method_not_allowed, not_found
+from woma.converters import CONVERTERS, StringConverter
+from woma.exceptions import RouteError
+from woma.http import Client
+from woma.router import Router
+from woma.tables import MAGIC, LazyController, compile_table, table_checksum
+
+
+def hello(request, response):
+    response.write('hello')
+    return response
+
+
+class SlugConverter(StringConverter):
+    def to_python(self, value):
+        return value.lower()
+
+
+TABLE = {
+    '/hello': {'get': hello, 'name': 'hello'},
+    '/articles/{id:int}': {
+        'get': 'woma.controllers:not_found',
+        'PURGE': 'woma.controllers:method_not_allowed',
+        'name': 'article',
+    },
+    '/missing': 'nowhere.at_all:controller',
+}
+
+
+class TestRouterFromTable(TestCase):
+    """Router.from_table(table, lazy=True)"""
+
+    def setUp(self):
+        self.router = Router.from_table(TABLE)
+        self.client = Client(self.router)
+
+    def test_adds_routes_in_order(self):
+        self.assertEqual([route.path for route in self.router.routes.routes],
+                         list(TABLE))
+        self.assertEqual(self.client.get('/hello').text, 'hello')
+        self.assertEqual(self.router.url_for('article', id=3), '/articles/3')
+
+    def test_imports_controllers_on_first_request(self):
+        endpoint = self.router.routes.names['article'].endpoint
+        controller = endpoint.controllers['get']
+        self.assertEqual(controller,
+                         LazyController('woma.controllers:not_found'))
+        self.assertIsNone(controller.controller)
+
+        self.assertEqual(self.client.get('/articles/3').status_code, 404)
+        self.assertIs(controller.controller, not_found)
+
+    def test_maps_other_methods(self):
+        response = self.client.request('/articles/3', 'PURGE')
+        self.assertEqual(response.status_code, 405)
+        endpoint = self.router.routes.names['article'].endpoint
+        self.assertIs(endpoint.controllers['purge'].resolve(),
+                      method_not_allowed)
+
+    def test_imports_controllers_up_front_unless_lazy(self):
+        with self.assertRaises(RouteError) as raised:
+            Router.from_table(TABLE, lazy=False)
+        self.assertIn('/missing: No module named', str(raised.exception))
+
+    def test_warmup_imports_controllers(self):
+        router = Router.from_table({'/': 'woma.controllers:not_found'})
+        router.warmup()
+        controller = router.routes.routes[0].endpoint.controllers['get']
+        self.assertIs(controller.controller, not_found)
+
+
+class TestRouterFromTableValidation(TestCase):
+    """Router.from_table(table) with problems"""
+
+    def test_reports_every_problem_at_once(self):
+        with self.assertRaises(RouteError) as raised:
+            Router.from_table({
+                'nope': hello,
+                '/a/{id:num}': hello,
+                '/b': {'get': 'not an import string', 'name': 'b'},
+                '/c': {'get': 3, 'name': 'b'},
+                '/d': {'not-a-method': hello},
+                '/e': {'name': 'e'},
+            })
+        self.assertEqual(str(raised.exception).splitlines()[1:], [
+            "nope: paths must start with '/'",
+            "/a/{id:num}: Unknown converter 'num' in {id:num}",
+            "/b: 'not an import string' is not a 'module:controller' "
+            'import string',
+            "/c: duplicate route name 'b'",
+            '/c: 3 is not a controller',
+            "/d: 'not-a-method' is not an HTTP method",
+            '/e: no controllers',
+        ])
+
+    def test_adds_no_routes_if_there_are_problems(self):
+        with self.assertRaises(RouteError):
+            Router.from_table({'/a': hello, 'b': hello})
+
+
+class TestRouterFromFile(TestCase):
+    """Router.from_file(filename)"""
+
+    def test_loads_table_from_json(self):
+        table = {'/': {'get': 'woma.controllers:not_found', 'name': 'home'}}
+        with tempfile.NamedTemporaryFile('w', suffix='.json',
+                                         delete=False) as f:
+            json.dump(table, f)
+        self.addCleanup(os.remove, f.name)
+
+        router = Router.from_file(f.name)
+
+        self.assertEqual(router.url_for('home'), '/')
+        self.assertEqual(Client(router).get('/').status_code, 404)
+
+
+class TestRouterFromCompiled(TestCase):
+    """Router.from_compiled(filename, table=None)"""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.filename = os.path.join(directory, 'routes.compiled')
+        self.table = {
+            '/hello': {'get': hello, 'name': 'hello'},
+            '/articles/{id:int}': {
+                'get': 'woma.controllers:not_found',
+                'PURGE': 'woma.controllers:method_not_allowed',
+                'name': 'article',
+            },
+            '/articles/{slug}': 'woma.controllers:method_not_allowed',
+            '/files/{rest:path}': hello,
+        }
+        self.checksum = compile_table(self.table, self.filename)
+
+    def test_routes_like_the_table(self):
+        router = Router.from_compiled(self.filename)
+        original = Router.from_table(self.table)
+        for path in ('/hello', '/articles/3', '/articles/new', '/files/a/b',
+                     '/nothing'):
+            match = router.routes.match(path)
+            expected = original.routes.match(path)
+            self.assertEqual(match.route.path, expected.route.path)
+            self.assertEqual(match.kwargs, expected.kwargs)
+        self.assertEqual(router.url_for('article', id=3), '/articles/3')
+        client = Client(router)
+        self.assertEqual(client.get('/hello').text, 'hello')
+        self.assertEqual(client.request('/articles/3', 'PURGE').status_code,
+                         405)
+
+    def test_saves_controllers_as_import_strings(self):
+        router = Router.from_compiled(self.filename)
+        endpoint = router.routes.names['hello'].endpoint
+        self.assertEqual(endpoint.controllers['get'],
+                         LazyController(hello.__module__ + ':hello'))
+
+    def test_returns_the_table_checksum(self):
+        self.assertEqual(self.checksum, table_checksum(self.table))
+
+    def test_checks_the_file_is_up_to_date_with_the_table(self):
+        Router.from_compiled(self.filename, self.table)
+        self.table['/bye'] = hello
+        with self.assertRaises(RouteError) as raised:
+            Router.from_compiled(self.filename, self.table)
+        self.assertIn('was not compiled from this table',
+                      str(raised.exception))
+
+    def test_checks_the_file_is_not_corrupt(self):
+        with open(self.filename, 'r+b') as f:
+            f.seek(-1, os.SEEK_END)
+            last = f.read(1)
+            f.seek(-1, os.SEEK_END)
+            f.write(bytes([last[0] ^ 1]))
+        with self.assertRaises(RouteError) as raised:
+            Router.from_compiled(self.filename)
+        self.assertIn('is corrupt', str(raised.exception))
+
+    def test_checks_the_file_is_a_compiled_table(self):
+        with open(self.filename, 'w') as f:
+            json.dump(self.table, f, default=str)
+        with self.assertRaises(RouteError) as raised:
+            Router.from_compiled(self.filename)
+        self.assertIn('is not a compiled route table', str(raised.exception))
+
+    def test_saves_json(self):
+        with open(self.filename, 'rb') as f:
+            content = f.read()
+        data = json.loads(content[len(MAGIC) + 32:].decode('utf-8'))
+        self.assertEqual(data['checksum'], self.checksum)
+
+    def test_reports_unknown_converters(self):
+        CONVERTERS['slug'] = SlugConverter()
+        try:
+            compile_table({'/{name:slug}': hello}, self.filename)
+        finally:
+            del CONVERTERS['slug']
+        with self.assertRaises(RouteError) as raised:
+            Router.from_compiled(self.filename)
+        self.assertIn("Unknown converter 'slug'", str(raised.exception))
+
+    def test_requires_importable_controllers(self):
+        with self.assertRaises(RouteError) as raised:
+            compile_table({'/': lambda request, response: response},
+                          self.filename)
+        self.assertIn('has no import string', str(raised.exception))
@@ -33,7 +33,7 @@ class Examples(Nosetests):
     """Run doctests and any tests in the examples/ directory."""
 
     def get_args(self, *args, **kwargs):
-        return ['-x', 'woma', 'examples']
+        return ['-x', 'woma', 'examples', 'benchmarks']
 
 
 clear = ScreenClearer(all_files=True)
@@ -0,0 +1,211 @@
+"""Serve a Woma router with an ASGI server.
+
+    from woma.router import Router
+    router = Router()
+    router.add('/hello/{name}', get=hello_controller)
+    app = router.asgi  # e.g. ``uvicorn app:app``
+
+Each HTTP request is turned into a WSGI-style ``environ`` so routing,
+``request.kwargs``, and the ``woma.http`` Request and Response objects behave
+exactly as they do under WSGI. The difference is how controllers are run:
+``async def`` controllers are awaited on the server's event loop, and sync
+controllers are run in a thread pool so they never block it. Endpoints that
+are plain WSGI apps are run in the thread pool as a whole.
+
+"""
+import asyncio
+import inspect
+import io
+import sys
+
+from woma.endpoints import Endpoint, is_async
+from woma.http import Request, Response, StaticResponse
+from woma.instrumentation import Spans
+
+_TOO_LARGE = StaticResponse(413, 'The request body is too large\n')
+
+
+class ASGIApp(object):
+    """An ASGI application dispatching requests through a Router.
+
+    - router: a woma.router.Router (or anything with an ``endpoint_for``
+      method taking an environ and returning a WSGI app).
+
+    - executor: the concurrent.futures.Executor used to run sync code. When
+      None, the event loop's default executor is used.
+
+    - max_body_size: the largest request body, in bytes. Bodies are read in
+      full before routing, so larger ones are answered with 413 Request
+      Entity Too Large as soon as they go over. None means no limit.
+
+    """
+
+    def __init__(self, router, executor=None, max_body_size=None):
+        self.router = router
+        self.executor = executor
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await _lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError('Unsupported ASGI scope type: %s' % scope['type'])
+
+        body = await _read_body(receive, self.max_body_size)
+        if body is None:
+            environ = environ_from_scope(scope, b'')
+            return await self._respond(_TOO_LARGE, environ, send)
+        environ = environ_from_scope(scope, body)
+        endpoint = self.router.endpoint_for(environ)
+        if isinstance(endpoint, Endpoint):
+            response = endpoint.early_response(environ)
+            if response is None:
+                try:
+                    response = await self._call_controller(endpoint, environ)
+                    response = endpoint.finish_response(environ, response)
+                finally:
+                    # see Endpoint.__call__
+                    environ.pop('woma.request', None)
+            await self._respond(response, environ, send)
+        else:
+            await self._respond(endpoint, environ, send, in_thread=True)
+
+    async def _call_controller(self, endpoint, environ):
+        spans = Spans.for_environ(environ, endpoint.hooks)
+        request = Request.from_environ(environ)
+        response = Response.for_request(request)
+        if spans:
+            spans.mark('request')
+
+        handler = endpoint.handler_for(environ)
+        if is_async(handler):
+            response = await handler(request, response)
+        else:
+            response = await self._run_sync(handler, request, response)
+            if inspect.isawaitable(response):
+                # sync middleware around an async controller
+                response = await response
+        if spans:
+            spans.mark('controller')
+        return response
+
+    async def _respond(self, app, environ, send, in_thread=False):
+        started = []
+
+        def start_response(status, headers, exc_info=None):
+            started[:] = [status, headers]
+
+        if in_thread:
+            body = await self._run_sync(app, environ, start_response)
+        else:
+            body = app(environ, start_response)
+        status, headers = started
+        await send({
+            'type': 'http.response.start',
+            'status': int(status.split(' ', 1)[0]),
+            'headers': [(name.lower().encode('latin-1'),
+                         value.encode('latin-1'))
+                        for name, value in headers],
+        })
+        try:
+            if isinstance(body, (list, tuple)):
+                for chunk in body:
+                    await _send_chunk(send, chunk)
+            else:
+                chunks = iter(body)
+                while True:
+                    chunk = await self._run_sync(next, chunks, None)
+                    if chunk is None:
+                        break
+                    await _send_chunk(send, chunk)
+        finally:
+            close = getattr(body, 'close', None)
+            if close is not None:
+                close()
+        await send({'type': 'http.response.body', 'body': b''})
+
+    def _run_sync(self, func, *args):
+        loop = asyncio.get_event_loop()
+        return loop.run_in_executor(self.executor, func, *args)
+
+
+def environ_from_scope(scope, body=b''):
+    """Build a WSGI environ from an ASGI http scope and the request body."""
+    script_name = scope.get('root_path', '')
+    path = scope['path']
+    if script_name and path.startswith(script_name):
+        path = path[len(script_name):]
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': _to_wsgi_str(script_name),
+        'PATH_INFO': _to_wsgi_str(path),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': 'HTTP/%s' % scope.get('http_version', '1.1'),
+        'REMOTE_ADDR': client[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+        'asgi.scope': scope,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = 'HTTP_' + name
+        if name in environ:
+            value = environ[name] + ',' + value
+        environ[name] = value
+    # the body has already been read in full, so this is its real length
+    environ['CONTENT_LENGTH'] = str(len(body))
+    return environ
+
+
+def _to_wsgi_str(path):
+    # WSGI strings are bytes decoded as latin-1; ASGI paths are decoded utf-8
+    return path.encode('utf-8').decode('latin-1')
+
+
+async def _read_body(receive, limit=None):
+    # the whole body, or None once it's over limit
+    chunks = []
+    size = 0
+    more_body = True
+    while more_body:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if limit is not None and size > limit:
+            return None
+        chunks.append(chunk)
+        more_body = message.get('more_body', False)
+    return b''.join(chunks)
+
+
+async def _send_chunk(send, chunk):
+    if chunk:
+        await send({
+            'type': 'http.response.body',
+            'body': chunk,
+            'more_body': True,
+        })
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
@@ -0,0 +1,236 @@
+"""Caching of whole responses for an Endpoint.
+
+A ResponseCache stores the status, headers and body of successful GET and
+HEAD responses. A cached response is written straight to ``start_response``,
+so a hit skips the controller and never builds a Request or Response (unless
+there's middleware, see below):
+
+>>> from woma.endpoints import Endpoint
+>>> from woma.http import Client
+>>> calls = []
+>>> def controller(request, response):
+...     calls.append(request.path)
+...     response.write('expensive')
+...     return response
+...
+>>> cache = ResponseCache(ttl=60)
+>>> client = Client(Endpoint(get=controller, cache=cache))
+>>> client.get('/thing').text
+'expensive'
+>>> client.get('/thing').text
+'expensive'
+>>> calls
+['/thing']
+>>> cache.hits, cache.misses
+(1, 1)
+
+Responses are cached per method, path (with query string), ``request.kwargs``,
+and the values of the request headers named in ``headers`` and in the
+response's ``Vary`` header, and HEAD requests are answered from the cached
+GET responses. Requests whose ``If-None-Match`` header matches the cached
+response's ``ETag`` get a 304 Not Modified. The response's ``Cache-Control``
+is honored:
+``no-store``, ``no-cache`` and ``private`` responses are never cached, and
+``max-age`` (or ``s-maxage``) replaces the default ``ttl``.
+
+If the endpoint or its router has middleware, e.g. to check authorization,
+the cache is used inside it: the middleware runs for every request, and
+only the controller is skipped on a hit.
+
+Controllers that change a resource can drop its cached responses:
+
+>>> cache.invalidate('/thing')
+>>> client.get('/thing').text
+'expensive'
+>>> calls
+['/thing', '/thing']
+
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from webob.etag import ETagMatcher
+from webob.response import filter_headers
+
+from woma.http import request_path
+
+
+class ResponseCache(object):
+    """A bounded, least-recently-used cache of responses.
+
+    - ttl: default number of seconds a response stays fresh.
+
+    - max_bytes: the memory budget. When the cached bodies and headers would
+      take more than this, the least recently used responses are evicted.
+
+    - headers: names of request headers whose values are part of the key,
+      e.g. ``('Accept', 'Authorization')``.
+
+    """
+
+    methods = ('GET', 'HEAD')
+
+    def __init__(self, ttl=60, max_bytes=16 * 1024 * 1024, headers=(),
+                 clock=time.monotonic):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.headers = tuple(_environ_key(name) for name in headers)
+        self.clock = clock
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._vary = {}
+        # the number of cached variants for each base key
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, environ):
+        """Return the cached response (a WSGI app) for environ, or None."""
+        if environ.get('REQUEST_METHOD') not in self.methods:
+            return None
+        base = self._base_key(environ)
+        key = self._key(base, environ, self._vary.get(base, ()))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires <= self.clock():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def store(self, environ, response):
+        """Cache the response for environ, if it's allowed to be cached."""
+        if environ.get('REQUEST_METHOD') not in self.methods:
+            return
+        ttl = self._ttl(response)
+        if not ttl:
+            return
+
+        base = self._base_key(environ)
+        vary = tuple(
+            _environ_key(name) for name in response.vary or ()
+            if _environ_key(name) not in self.headers)
+        key = self._key(base, environ, vary)
+        entry = CachedResponse(
+            response.status, tuple(response.headerlist), response.body,
+            self.clock() + ttl, response.etag)
+        if entry.size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if vary:
+                self._vary[base] = vary
+            self._entries[key] = entry
+            self._counts[base] = self._counts.get(base, 0) + 1
+            self.size += entry.size
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, path):
+        """Drop every cached response for path, e.g. after changing it."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0][1] == path]:
+                self._remove(key)
+
+    def clear(self):
+        """Drop every cached response."""
+        with self._lock:
+            self._entries.clear()
+            self._vary.clear()
+            self._counts.clear()
+            self.size = 0
+
+    def _base_key(self, environ):
+        path = request_path(environ)
+        query = environ.get('QUERY_STRING')
+        kwargs = environ.get('router.kwargs')
+        method = environ['REQUEST_METHOD']
+        return (
+            # HEAD is answered from the cached GET response, without a body
+            'GET' if method == 'HEAD' else method,
+            path,
+            query or '',
+            tuple(sorted(kwargs.items())) if kwargs else (),
+        )
+
+    def _key(self, base, environ, vary):
+        names = self.headers + vary
+        return base, tuple(environ.get(name) for name in names)
+
+    def _ttl(self, response):
+        if response.status_code != 200 or response.streaming:
+            return None
+        if 'Set-Cookie' in response.headers:
+            return None
+        if '*' in (response.vary or ()):
+            return None
+        cache_control = response.cache_control
+        if (cache_control.no_store or cache_control.no_cache or
+                cache_control.private):
+            return None
+        max_age = cache_control.s_maxage
+        if max_age is None:
+            max_age = cache_control.max_age
+        return self.ttl if max_age is None else max_age
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.size -= entry.size
+        base = key[0]
+        self._counts[base] -= 1
+        if not self._counts[base]:
+            # keeps _vary bounded too, once no variant is left
+            del self._counts[base]
+            self._vary.pop(base, None)
+
+
+class CachedResponse(object):
+    """An immutable response that is written straight to start_response."""
+
+    __slots__ = ('status', 'headerlist', 'body', 'expires', 'etag', 'size')
+
+    def __init__(self, status, headerlist, body, expires, etag=None):
+        self.status = status
+        self.headerlist = headerlist
+        self.body = body
+        self.expires = expires
+        self.etag = etag
+        self.size = len(body) + sum(
+            len(name) + len(value) for name, value in headerlist)
+
+    def __call__(self, environ, start_response):
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+        if if_none_match and self.etag is not None:
+            if self.etag in ETagMatcher.parse(if_none_match, strong=False):
+                start_response('304 Not Modified',
+                               filter_headers(list(self.headerlist)))
+                return []
+        start_response(self.status, list(self.headerlist))
+        if environ.get('REQUEST_METHOD') == 'HEAD':
+            return []
+        return [self.body]
+
+    def fill(self, response):
+        """Copy the cached status, headers and body into response."""
+        response.status = self.status
+        response.headerlist = list(self.headerlist)
+        response.body = self.body
+        return response
+
+
+def _environ_key(header_name):
+    name = header_name.upper().replace('-', '_')
+    if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+        return name
+    return 'HTTP_' + name
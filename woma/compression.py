@@ -0,0 +1,198 @@
+"""Compression of response bodies.
+
+Compression is middleware (see `woma.middleware`), so it can be used for a
+whole router or for single endpoints:
+
+>>> from woma.http import Client
+>>> from woma.router import Router
+>>> def report(request, response):
+...     response.write('All quiet. ' * 100)
+...     return response
+...
+>>> router = Router()
+>>> router.add('/report', get=report)
+>>> router.use(Compression())
+>>> response = Client(router).get('/report', {'Accept-Encoding': 'gzip'})
+>>> response.content_encoding
+'gzip'
+>>> response.content_length < 100
+True
+>>> response.decode_content()
+>>> response.text[:22]
+'All quiet. All quiet. '
+
+The encoding is negotiated from the request's ``Accept-Encoding`` header:
+``br`` (if the ``brotli`` package is installed), ``gzip`` or ``deflate``.
+Bodies smaller than ``min_size`` bytes, bodies that already have a
+``Content-Encoding``, responses with ``Cache-Control: no-transform``, and
+content types that don't compress well (e.g. images) are left alone.
+Streamed bodies (see ``Response.stream``) are compressed chunk by chunk as
+the server iterates over them.
+
+With a ``cache_size``, compressed bodies are kept in a least-recently-used
+cache, keyed by a hash of the body and the encoding, so a payload that is
+sent over and over is only compressed once.
+
+"""
+import hashlib
+import inspect
+import threading
+import zlib
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+)
+
+
+class Compression(object):
+    """Middleware compressing response bodies.
+
+    - min_size: bodies smaller than this many bytes are sent uncompressed.
+
+    - level: the gzip and deflate compression level, 1 (fastest) to 9.
+
+    - brotli_quality: the brotli quality, 0 (fastest) to 11.
+
+    - cache_size: the number of compressed bodies to keep. 0 disables the
+      cache.
+
+    - types: prefixes of the content types to compress.
+
+    """
+
+    def __init__(self, min_size=500, level=6, brotli_quality=4, cache_size=0,
+                 types=COMPRESSIBLE_TYPES):
+        self.min_size = min_size
+        self.level = level
+        self.brotli_quality = brotli_quality
+        self.cache_size = cache_size
+        self.types = tuple(types)
+        self.encodings = ['gzip', 'deflate']
+        if brotli is not None:
+            self.encodings.insert(0, 'br')
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, handler):
+        def compressing_handler(request, response):
+            response = handler(request, response)
+            if inspect.isawaitable(response):
+                return self._compress_awaited(request, response)
+            return self.compress(request, response)
+        return compressing_handler
+
+    async def _compress_awaited(self, request, awaitable):
+        return self.compress(request, await awaitable)
+
+    def compress(self, request, response):
+        """Compress the body of response if the request accepts it."""
+        if not self._compressible(response):
+            return response
+        response.vary = _add_vary(response.vary, 'Accept-Encoding')
+        encoding = self._encoding(request)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            compress, flush = self._compressor(encoding)
+            response.app_iter = _compress_chunks(
+                response.app_iter, compress, flush)
+            response.content_length = None
+        else:
+            response.body = self._compressed(response, encoding)
+        response.content_encoding = encoding
+        return response
+
+    def _compressible(self, response):
+        if response.status_code < 200 or response.status_code in (204, 304):
+            return False
+        if response.content_encoding or not response.content_type:
+            return False
+        if not response.content_type.startswith(self.types):
+            return False
+        if response.cache_control.no_transform:
+            return False
+        if response.streaming:
+            size = response.content_length
+            return size is None or size >= self.min_size
+        size = response.content_length
+        if size is None:
+            # e.g. a controller set app_iter to a list of chunks
+            size = len(response.body)
+        return size >= self.min_size
+
+    def _encoding(self, request):
+        if 'HTTP_ACCEPT_ENCODING' not in request.environ:
+            return None
+        offers = request.accept_encoding.acceptable_offers(self.encodings)
+        return offers[0][0] if offers else None
+
+    def _compressed(self, response, encoding):
+        body = response.body
+        if not self.cache_size:
+            return self._compress(body, encoding)
+
+        # an ETag is only unique for one resource, so key on the body itself
+        key = (hashlib.sha1(body).digest(), encoding)
+        with self._lock:
+            compressed = self._cache.get(key)
+            if compressed is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return compressed
+            self.misses += 1
+
+        compressed = self._compress(body, encoding)
+        with self._lock:
+            self._cache[key] = compressed
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return compressed
+
+    def _compress(self, body, encoding):
+        compress, flush = self._compressor(encoding)
+        return compress(body) + flush()
+
+    def _compressor(self, encoding):
+        # (compress, flush) functions for a new compression stream
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            return compressor.process, compressor.finish
+        # gzip has a header and trailer around the deflate data
+        wbits = 31 if encoding == 'gzip' else 15
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, wbits)
+        return compressor.compress, compressor.flush
+
+
+def _add_vary(vary, header):
+    if not vary:
+        return (header,)
+    if header in vary:
+        return vary
+    return tuple(vary) + (header,)
+
+
+def _compress_chunks(chunks, compress, flush):
+    try:
+        for chunk in chunks:
+            data = compress(chunk)
+            if data:
+                yield data
+        yield flush()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
@@ -1,3 +1,6 @@
+from woma.http import StaticResponse
+
+
 def not_found(request, response):
     """Basic controller to act as default for unmatched request paths."""
     response.status_code = 404
@@ -10,3 +13,7 @@ def method_not_allowed(request, response):
     response.status_code = 405
     response.write('%s is not allowed\n' % request.method)
     return response
+
+
+# Prerendered versions of the controllers above. See woma.http.StaticResponse
+NOT_FOUND = StaticResponse(404, "We can't find {path}\n")
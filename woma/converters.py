@@ -0,0 +1,129 @@
+"""Converters for the dynamic segments of route paths.
+
+A dynamic segment can name a converter after a colon, e.g. ``{id:int}``. The
+converter decides what the segment matches and turns the matched text into
+the value passed to controllers in ``request.kwargs``:
+
+- ``{name}`` or ``{name:str}``: any text up to the next ``/``, as a string.
+- ``{name:int}``: digits only, as an int.
+- ``{name:uuid}``: a UUID like ``'6fa459ea-ee8a-3ca4-894e-db77e160355e'``,
+  as a ``uuid.UUID``.
+- ``{name:path}``: the rest of the path, including ``/``, as a string.
+
+>>> name, converter = parse_placeholder('id:int')
+>>> name
+'id'
+>>> converter.to_python('42')
+42
+
+Paths that don't fit the converter simply don't match the route, so the
+router moves on to the next one.
+
+You can add your own converters to ``CONVERTERS``, usually by subclassing
+StringConverter. A converter has a ``regex`` (without capturing groups), a
+``spans_segments`` flag that is True if the regex can match ``/``, and
+``to_python`` and ``to_url`` methods.
+
+"""
+import re
+import uuid
+
+from woma.exceptions import RouteError
+
+PLACEHOLDER = re.compile(r'\{([^}]*)\}')
+
+
+class StringConverter(object):
+    """Match any text in a single path segment."""
+
+    regex = '[^/]+'
+    spans_segments = False
+
+    def __repr__(self):
+        return '%s()' % type(self).__name__
+
+    def to_python(self, value):
+        return value
+
+    def to_url(self, value):
+        return str(value)
+
+
+class IntConverter(StringConverter):
+    """Match digits, passed to controllers as an int."""
+
+    regex = '[0-9]+'
+
+    def to_python(self, value):
+        return int(value)
+
+
+class UUIDConverter(StringConverter):
+    """Match a UUID, passed to controllers as a uuid.UUID."""
+
+    regex = ('[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-'
+             '[0-9a-fA-F]{4}-[0-9a-fA-F]{12}')
+
+    def to_python(self, value):
+        return uuid.UUID(value)
+
+
+class PathConverter(StringConverter):
+    """Match the rest of the path, including slashes."""
+
+    regex = '[^/].*?'
+    spans_segments = True
+
+
+CONVERTERS = {
+    'str': StringConverter(),
+    'int': IntConverter(),
+    'uuid': UUIDConverter(),
+    'path': PathConverter(),
+}
+
+
+def parse_placeholder(placeholder):
+    """Return (name, converter) for the text inside a ``{...}`` segment."""
+    name, _, converter_name = placeholder.partition(':')
+    converter_name = converter_name or 'str'
+    if converter_name not in CONVERTERS:
+        raise RouteError('Unknown converter %r in {%s}' % (
+            converter_name, placeholder))
+    return name, CONVERTERS[converter_name]
+
+
+def compile_template(template, named=False):
+    """Return (regex, placeholders) for a path template (or part of one).
+
+    The regex matches what the template matches, without anchors. Its groups
+    capture the dynamic segments, and are named after them if ``named`` is
+    True. ``placeholders`` is a list of (name, converter) in the same order.
+
+    >>> compile_template('/articles/{id:int}')
+    ('/articles/([0-9]+)', [('id', IntConverter())])
+
+    """
+    parts = PLACEHOLDER.split(template)
+    regex = []
+    placeholders = []
+    # split() alternates static text and the text inside placeholders
+    for i, part in enumerate(parts):
+        if not i % 2:
+            regex.append(re.escape(part))
+            continue
+        name, converter = parse_placeholder(part)
+        placeholders.append((name, converter))
+        if named:
+            regex.append('(?P<%s>%s)' % (name, converter.regex))
+        else:
+            regex.append('(%s)' % converter.regex)
+    return ''.join(regex), placeholders
+
+
+def convert(placeholders, values):
+    """Return kwargs for captured values, converted to python objects."""
+    return {
+        name: converter.to_python(value)
+        for (name, converter), value in zip(placeholders, values)
+    }
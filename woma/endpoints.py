@@ -1,5 +1,10 @@
-from woma.controllers import not_found, method_not_allowed
-from woma.http import Request, Response
+import importlib
+import inspect
+
+from woma.controllers import NOT_FOUND, method_not_allowed
+from woma.http import Request, Response, StaticResponse
+from woma.instrumentation import Spans
+from woma.middleware import compose
 
 
 class Endpoint(object):
@@ -38,6 +43,42 @@ class Endpoint(object):
     >>> client.put()
     <Response at ... 405 Method Not Allowed>
 
+    HEAD requests are handled by the GET controller unless you pass a
+    ``head`` controller, and the body is discarded (a streamed body is never
+    iterated). OPTIONS requests are answered with an ``Allow`` header listing
+    the methods with controllers, unless you pass an ``options`` controller,
+    and 405 responses include the same header:
+
+    >>> client.head().headers['Content-Length']
+    '17'
+    >>> client.options().headers['Allow']
+    'GET, POST, HEAD, OPTIONS'
+
+    Requests with any other method get a prebuilt 405 response (see
+    `woma.http.StaticResponse`), without building a Request or Response or
+    running any middleware.
+
+    Other methods, e.g. WebDAV's, can be given controllers with ``methods``:
+
+    >>> def propfind(request, response):
+    ...     response.status_code = 207
+    ...     return response
+    ...
+    >>> Client(Endpoint(methods={'PROPFIND': propfind})).request(
+    ...     '/', 'PROPFIND')
+    <Response at ... 207 Multi Status>
+
+    Controllers can also be ``async def`` functions. Under WSGI they are run
+    to completion on a new event loop. Under ASGI (see `woma.asgi`) they are
+    awaited, and sync controllers are run in a thread pool instead.
+
+    >>> async def async_controller(request, response):
+    ...     response.write('async')
+    ...     return response
+    ...
+    >>> Client(Endpoint(async_controller)).get().text
+    'async'
+
     You can put an endpoint behind a router to serve a particular URL:
 
     >>> from woma.router import Router
@@ -46,9 +87,49 @@ class Endpoint(object):
     >>> Client(router).get('/widgets').text
     'widget 1 widget 2'
 
+    GET and HEAD requests with ``If-None-Match`` or ``If-Modified-Since``
+    headers get a 304 Not Modified response if the response's ``ETag`` or
+    ``Last-Modified`` header (set by the controller) shows the client already
+    has it. Pass ``etag=True`` to set the ``ETag`` to a hash of the body when
+    the controller doesn't set one.
+
+    Better still, pass a ``validator``: a cheap controller that only sets the
+    ``ETag`` and/or ``Last-Modified`` headers. It's called before the GET or
+    HEAD controller, which isn't called at all if the client's copy is
+    current. Like controllers, validators can be ``async def`` functions:
+
+    >>> def widgets_version(request, response):
+    ...     response.etag = str(len(DB))
+    ...     return response
+    ...
+    >>> versioned = Client(Endpoint(get=list_widgets,
+    ...                             validator=widgets_version))
+    >>> versioned.get().etag
+    '2'
+    >>> versioned.get(headers={'If-None-Match': '"2"'})
+    <Response at ... 304 Not Modified>
+
+    Responses can be cached by passing a `woma.cache.ResponseCache`:
+
+    >>> from woma.cache import ResponseCache
+    >>> cached_widgets = Endpoint(get=list_widgets, cache=ResponseCache())
+
+    Controllers can be wrapped in middleware (see `woma.middleware`):
+
+    >>> def no_widgets(handler):
+    ...     return lambda request, response: response
+    ...
+    >>> Client(Endpoint(get=list_widgets, middleware=[no_widgets])).get().text
+    ''
+
     """
     def __init__(self, default=None, get=None, post=None, put=None, patch=None,
-                 delete=None, head=None):
+                 delete=None, head=None, options=None, cache=None,
+                 middleware=(), etag=False, validator=None, methods=None):
+        self.cache = cache
+        self.etag = etag
+        self.validator = validator
+        self.hooks = []
         default = default or method_not_allowed
         self.controllers = {
             'get': get or default,
@@ -56,20 +137,272 @@ class Endpoint(object):
             'put': put or default,
             'patch': patch or default,
             'delete': delete or default,
-            'head': head or default,
+            'head': head or get or default,
         }
+        for method, controller in (methods or {}).items():
+            self.controllers[method.lower()] = controller
+        if options is not None:
+            self.controllers['options'] = options
+        self.allow = _allow(self.controllers)
+        self._allowed = frozenset(self.allow.split(', '))
+        self._not_allowed = StaticResponse(
+            405, '{method} is not allowed\n', [('Allow', self.allow)])
+        self._static = {
+            method.upper(): controller
+            for method, controller in self.controllers.items()
+            if isinstance(controller, StaticResponse)
+        }
+        self.middleware = list(middleware)
+        self._handlers = self._compose(())
+        self._compiled = {}
 
     def __call__(self, environ, start_response):
-        request = Request(environ)
-        response = Response.for_request(request)
+        response = self.early_response(environ)
+        if response is not None:
+            return response(environ, start_response)
+
+        spans = None
+        if self.hooks or environ.get('woma.hooks'):
+            spans = Spans.for_environ(environ, self.hooks)
+
+        request = Request.from_environ(environ)
+        try:
+            response = Response.for_request(request)
+            if spans:
+                spans.mark('request')
+
+            handler = self.handler_for(environ)
+            response = handler(request, response)
+            if inspect.isawaitable(response):
+                response = _run_until_complete(response)
+            if spans:
+                spans.mark('controller')
+
+            response = self.finish_response(environ, response)
+        finally:
+            # breaks the environ <-> request cycle, so both are freed as soon
+            # as the response is sent, without waiting for the cyclic GC
+            environ.pop('woma.request', None)
+        app_iter = response(environ, start_response)
+        if spans:
+            return spans.wrap(app_iter, 'response')
+        return app_iter
+
+    def add_hook(self, hook):
+        """Add a timing hook for requests to this endpoint.
+
+        See `woma.instrumentation` for details.
+
+        """
+        self.hooks.append(hook)
+
+    def early_response(self, environ):
+        """Return a response (WSGI app) that skips the controller, or None.
 
-        controller = self.controllers.get(
-            request.method.lower(), method_not_allowed)
-        response = controller(request, response)
-        return response(environ, start_response)
+        This is where requests with a method that isn't allowed are rejected,
+        and, if there's no middleware to run, where StaticResponse controllers
+        are sent and cached responses are found. With middleware (e.g. to
+        check authorization), the cache is used inside it instead.
+
+        """
+        method = environ['REQUEST_METHOD']
+        if method not in self._allowed:
+            return self._not_allowed
+        if self._has_middleware(environ):
+            return None
+        if self._static:
+            static = self._static.get(method)
+            if static is not None:
+                return static
+        if self.cache is not None:
+            return self.cache.get(environ)
+        return None
+
+    def finish_response(self, environ, response):
+        """Return the response to send, given the controller's response."""
+        if self.etag and response.status_code == 200 and (
+                response.etag is None and not response.streaming):
+            response.md5_etag()
+        if 'HTTP_IF_NONE_MATCH' in environ or (
+                'HTTP_IF_MODIFIED_SINCE' in environ):
+            # webob answers with 304 Not Modified if the validators match
+            response.conditional_response = response.status_code == 200
+        if self.cache is not None and not self._has_middleware(environ):
+            if self._stores(environ['REQUEST_METHOD']):
+                self.cache.store(environ, response)
+        return response
+
+    def _has_middleware(self, environ):
+        return bool(self.middleware or environ.get('woma.middleware'))
+
+    def _stores(self, method):
+        # a head controller's response may not have the GET body
+        return (method != 'HEAD' or
+                self.controllers['head'] is self.controllers['get'])
+
+    def use(self, *middleware):
+        """Wrap this endpoint's controllers in more middleware."""
+        self.middleware.extend(middleware)
+        self._handlers = self._compose(())
+        self._compiled = {}
+
+    def handler_for(self, environ):
+        """Return the handler for the request in environ.
+
+        That's the controller for the request's method, wrapped in this
+        endpoint's middleware, and in the router's middleware if the router
+        put any in ``environ['woma.middleware']``.
+
+        """
+        outer = environ.get('woma.middleware')
+        handlers = self.compile(outer) if outer else self._handlers
+        # early_response has already rejected methods that aren't allowed
+        return handlers[environ['REQUEST_METHOD']]
+
+    def compile(self, outer):
+        """Return the handlers composed with outer (e.g. router) middleware.
+
+        They are composed on first use and reused afterwards, so calling this
+        ahead of time (see Router.finalize) only moves that work to startup.
+
+        """
+        compiled = self._compiled.get(id(outer))
+        if compiled is None or compiled[0] is not outer:
+            compiled = (outer, self._compose(outer))
+            self._compiled[id(outer)] = compiled
+        return compiled[1]
+
+    def warmup(self):
+        """Import what calling this endpoint's controllers needs.
+
+        Otherwise that happens on the first request. See Router.warmup.
+
+        """
+        controllers = []
+        for controller in self.controllers.values():
+            # e.g. a woma.tables.LazyController
+            resolve = getattr(controller, 'resolve', None)
+            controllers.append(controller if resolve is None else resolve())
+        if any(is_async(controller) for controller in controllers):
+            importlib.import_module('asyncio')
+
+    def _compose(self, outer):
+        # keyed by REQUEST_METHOD, for methods that are allowed
+        middleware = list(outer) + self.middleware
+        handlers = {}
+        for method, controller in self.controllers.items():
+            if controller is method_not_allowed:
+                continue
+            if isinstance(controller, StaticResponse):
+                controller = controller.controller
+            if self.validator is not None and method in ('get', 'head'):
+                controller = _conditional(self.validator, controller)
+            if self.cache is not None and middleware and (
+                    method.upper() in self.cache.methods):
+                controller = _cached(
+                    self.cache, controller, self._stores(method.upper()))
+            handlers[method.upper()] = compose(middleware, controller)
+        if 'OPTIONS' not in handlers:
+            handlers['OPTIONS'] = compose(middleware, _options(self.allow))
+        return handlers
 
     def __eq__(self, other):
-        return self.controllers == other.controllers
+        return (self.controllers == other.controllers and
+                self.cache is other.cache and
+                self.middleware == other.middleware)
+
+
+def is_async(controller):
+    """Return True if calling controller returns an awaitable."""
+    return (inspect.iscoroutinefunction(controller) or
+            inspect.iscoroutinefunction(getattr(controller, '__call__', None)))
+
+
+def _allow(controllers):
+    # the Allow header for an endpoint, built once
+    methods = [method.upper() for method, controller in controllers.items()
+               if controller is not method_not_allowed]
+    if 'OPTIONS' not in methods:
+        methods.append('OPTIONS')
+    return ', '.join(methods)
+
+
+def _options(allow):
+    def options(request, response):
+        response.headers['Allow'] = allow
+        return response
+    return options
+
+
+def _conditional(validator, controller):
+    # calls controller only if the validator shows the client needs the body
+    if is_async(controller) or is_async(validator):
+        async def conditional_handler(request, response):
+            response = validator(request, response)
+            if inspect.isawaitable(response):
+                response = await response
+            if _is_not_modified(request, response):
+                return _not_modified(response)
+            response = controller(request, response)
+            if inspect.isawaitable(response):
+                response = await response
+            return response
+    else:
+        def conditional_handler(request, response):
+            response = validator(request, response)
+            if _is_not_modified(request, response):
+                return _not_modified(response)
+            return controller(request, response)
+    return conditional_handler
+
+
+def _cached(cache, controller, store):
+    # uses the cache inside the middleware, so the middleware runs on hits
+    if is_async(controller):
+        async def cached_handler(request, response):
+            cached = cache.get(request.environ)
+            if cached is not None:
+                return cached.fill(response)
+            response = await controller(request, response)
+            if store:
+                cache.store(request.environ, response)
+            return response
+    else:
+        def cached_handler(request, response):
+            cached = cache.get(request.environ)
+            if cached is not None:
+                return cached.fill(response)
+            response = controller(request, response)
+            if store:
+                cache.store(request.environ, response)
+            return response
+    return cached_handler
+
+
+def _is_not_modified(request, response):
+    # the same checks as webob's Response.conditional_response_app
+    if request.if_none_match and response.etag:
+        return response.etag in request.if_none_match
+    if request.if_modified_since and response.last_modified:
+        return response.last_modified <= request.if_modified_since
+    return False
+
+
+def _not_modified(response):
+    response.status_code = 304
+    del response.content_type
+    del response.content_length
+    return response
+
+
+def _run_until_complete(awaitable):
+    # asyncio is slow to import, and only needed for async controllers
+    import asyncio
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(awaitable)
+    finally:
+        loop.close()
 
 
-not_found = Endpoint(not_found)
+not_found = Endpoint(NOT_FOUND, options=NOT_FOUND)
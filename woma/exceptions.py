@@ -4,3 +4,15 @@ class WomaException(Exception):
 
 class NotFound(WomaException):
     pass
+
+
+class RouteError(WomaException):
+    pass
+
+
+class BuildError(WomaException):
+    pass
+
+
+class RequestTooLarge(WomaException):
+    pass
@@ -5,45 +5,302 @@ http://docs.webob.org/en/latest/ for full documentation. The only things
 documented here are the customizations.
 
 """
+import inspect
+import re
+from collections import namedtuple
+from time import perf_counter as clock
+from urllib.parse import quote, urlencode
+
 from webob import Request as BaseRequest
 from webob import Response as BaseResponse
+from webob.request import PATH_SAFE
+from webob.util import status_reasons
+
+from woma import serializers
+from woma.exceptions import RequestTooLarge
+from woma.stats import Stats
+
+# Characters that webob's request.path would percent-encode
+_UNSAFE_PATH_CHARS = re.compile(r'[^A-Za-z0-9_.\-~%s]' % re.escape(PATH_SAFE))
+
+# Fields a StaticResponse body can echo from the request
+_STATIC_FIELDS = re.compile(r'\{(path|method)\}')
+
+
+def request_path(environ):
+    """Return the path of the request in environ, without building a Request.
+
+    This is the same value as webob's ``request.path``: the (url quoted)
+    SCRIPT_NAME and PATH_INFO, without host or query string.
+
+    >>> request_path({'SCRIPT_NAME': '/app', 'PATH_INFO': '/hello/World'})
+    '/app/hello/World'
+    >>> request_path({'PATH_INFO': '/hello/Big World'})
+    '/hello/Big%20World'
+
+    """
+    path = environ.get('SCRIPT_NAME', '') + environ.get('PATH_INFO', '')
+    if _UNSAFE_PATH_CHARS.search(path):
+        path = quote(path.encode('latin-1'), PATH_SAFE)
+    return path
 
 
 class Client(object):
-    """Make requests to a wsgi app and return the response."""
+    """Make requests to a WSGI or ASGI app and return the responses.
+
+    >>> from woma.router import Router
+    >>> def hello(request, response):
+    ...     response.write('Hello %s' % request.GET.get('name', 'World'))
+    ...     return response
+    ...
+    >>> router = Router()
+    >>> router.add('/hello', get=hello)
+    >>> client = Client(router)
+    >>> client.get('/hello', query={'name': 'Bob'}).text
+    'Hello Bob'
+
+    The responses are webob Responses. Requests are made in-process: nothing
+    goes over the network. An ASGI app (e.g. ``router.asgi``) is run on an
+    event loop:
+
+    >>> Client(router.asgi).get('/hello').text
+    'Hello World'
+
+    For load tests, ``run`` makes many requests concurrently and measures
+    their latency:
+
+    >>> run = client.run(['/hello'] * 100, concurrency=10)
+    >>> len(run.responses), run.stats.count
+    (100, 100)
+
+    """
 
     def __init__(self, app):
         self.app = app
+        call = getattr(app, '__call__', None)
+        self.asgi = (inspect.iscoroutinefunction(app) or
+                     inspect.iscoroutinefunction(call))
+
+    def request(self, path, method='GET', body=None, headers=None,
+                query=None):
+        """Make a request and return the response.
+
+        - body: text or bytes.
+        - headers: a dict of request headers.
+        - query: a query string, or a dict (or list of pairs) to encode.
+
+        """
+        request = self._blank(path, method, body, headers, query)
+        if self.asgi:
+            import asyncio
+            return asyncio.run(self._call_asgi(request))
+        return request.get_response(self.app)
+
+    def get(self, path=None, headers=None, query=None):
+        return self.request(path, 'GET', headers=headers, query=query)
+
+    def post(self, path=None, body=None, headers=None, query=None):
+        return self.request(path, 'POST', body, headers, query)
+
+    def put(self, path=None, body=None, headers=None, query=None):
+        return self.request(path, 'PUT', body, headers, query)
 
-    def request(self, path, method, body=None):
+    def patch(self, path=None, body=None, headers=None, query=None):
+        return self.request(path, 'PATCH', body, headers, query)
+
+    def delete(self, path=None, headers=None, query=None):
+        return self.request(path, 'DELETE', headers=headers, query=query)
+
+    def head(self, path=None, headers=None, query=None):
+        return self.request(path, 'HEAD', headers=headers, query=query)
+
+    def options(self, path=None, headers=None, query=None):
+        return self.request(path, 'OPTIONS', headers=headers, query=query)
+
+    def run(self, requests, concurrency=1):
+        """Make many requests and return a ClientRun of responses and stats.
+
+        Each request is a path to GET, or a tuple of arguments for
+        ``Client.request``, e.g. ``('/articles', 'POST', '{}')``. Up to
+        ``concurrency`` requests are made at a time, on threads for a WSGI
+        app, or on one event loop for an ASGI app. The responses are in the
+        same order as the requests, and the stats are a
+        `woma.stats.Stats` of their latencies.
+
+        """
+        blanks = [
+            self._blank(*((request,) if isinstance(request, str)
+                          else request))
+            for request in requests]
+        # asyncio and concurrent.futures are slow to import, so they're only
+        # imported when needed
+        start = clock()
+        if self.asgi:
+            import asyncio
+            timed = asyncio.run(self._run_asgi(blanks, concurrency))
+        elif concurrency > 1:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(concurrency) as executor:
+                timed = list(executor.map(self._timed, blanks))
+        else:
+            timed = [self._timed(request) for request in blanks]
+        total = clock() - start
+        return ClientRun(
+            [response for response, _ in timed],
+            Stats.from_latencies([latency for _, latency in timed], total))
+
+    def _blank(self, path, method='GET', body=None, headers=None,
+               query=None):
         path = path or '/'
-        request = BaseRequest.blank(path)
+        if query:
+            if not isinstance(query, str):
+                query = urlencode(query, doseq=True)
+            path = '%s?%s' % (path, query)
+        request = BaseRequest.blank(path, headers=headers)
         request.method = method
-        request.text = body or ''
-        return request.get_response(self.app)
+        if isinstance(body, bytes):
+            request.body = body
+        else:
+            request.text = body or ''
+        return request
+
+    def _timed(self, request):
+        start = clock()
+        response = request.get_response(self.app)
+        return response, clock() - start
+
+    async def _run_asgi(self, requests, concurrency):
+        import asyncio
+        semaphore = asyncio.Semaphore(concurrency)
 
-    def get(self, path=None):
-        return self.request(path, 'GET')
+        async def timed(request):
+            async with semaphore:
+                start = clock()
+                response = await self._call_asgi(request)
+                return response, clock() - start
 
-    def post(self, path=None, body=None):
-        return self.request(path, 'POST', body)
+        return await asyncio.gather(*[timed(request) for request in requests])
 
-    def put(self, path=None, body=None):
-        return self.request(path, 'PUT', body)
+    async def _call_asgi(self, request):
+        environ = request.environ
+        body = request.body
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': request.method,
+            'scheme': 'http',
+            'path': environ['PATH_INFO'].encode('latin-1').decode('utf-8'),
+            'raw_path': environ['PATH_INFO'].encode('latin-1'),
+            'root_path': '',
+            'query_string': environ['QUERY_STRING'].encode('latin-1'),
+            'headers': [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in request.headers.items()],
+            'server': ('localhost', 80),
+            'client': ('127.0.0.1', 0),
+        }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        await self.app(scope, receive, send)
+        start = messages[0]
+        return BaseResponse(
+            status=start['status'],
+            headerlist=[(name.decode('latin-1'), value.decode('latin-1'))
+                        for name, value in start['headers']],
+            app_iter=[b''.join(
+                message.get('body', b'') for message in messages[1:])])
+
+
+class ClientRun(namedtuple('ClientRun', ['responses', 'stats'])):
+    """The responses and `woma.stats.Stats` of ``Client.run``."""
+
+    __slots__ = ()
 
 
 class Request(BaseRequest):
     """A webob.Request with additional properties."""
 
+    # See woma.serializers
+    json_serializer = serializers.JSON
+
+    # The largest body, in bytes, that Request.json will parse
+    max_json_size = 1024 * 1024
+
+    @classmethod
+    def from_environ(cls, environ):
+        """Return the Request for environ, creating it on first use.
+
+        The request is stored in the environ as ``'woma.request'``, so every
+        layer handling the same request shares a single Request object. That
+        makes a reference cycle, which Endpoint breaks once the response is
+        built, so requests are freed without waiting for the cyclic GC.
+
+        >>> environ = {}
+        >>> Request.from_environ(environ) is Request.from_environ(environ)
+        True
+
+        """
+        request = environ.get('woma.request')
+        if request is None:
+            request = environ['woma.request'] = cls(environ)
+        return request
+
     @property
     def kwargs(self):
         """Returns 'router.kwargs' from environ if present, or {} otherwise."""
         return self.environ.get('router.kwargs', {})
 
+    @property
+    def json(self):
+        """The body parsed as JSON, straight from bytes.
+
+        The body is parsed on first use, and the result is reused after that.
+        woma.exceptions.RequestTooLarge is raised if the body is larger than
+        ``max_json_size``, without reading more than that, and ValueError if
+        it isn't valid JSON. (Under ASGI, the body has already been read; see
+        ``max_body_size`` in `woma.asgi.ASGIApp`.)
+
+        >>> request = Request.blank('/', POST=b'{"name": "World"}')
+        >>> request.json
+        {'name': 'World'}
+
+        """
+        environ = self.environ
+        if 'woma.json' not in environ:
+            limit = self.max_json_size
+            length = self.content_length
+            if length is not None and length > limit:
+                raise RequestTooLarge(
+                    'JSON body of %d bytes is over the limit of %d' % (
+                        length, limit))
+            if length is None and not self.is_body_seekable:
+                # e.g. a chunked body: read no more than a byte over the limit
+                body = self.body_file.read(limit + 1)
+            else:
+                body = self.body
+            if len(body) > limit:
+                raise RequestTooLarge(
+                    'JSON body is over the limit of %d bytes' % limit)
+            if length is None:
+                # so request.body still has it
+                self.body = body
+            environ['woma.json'] = self.json_serializer.loads(body)
+        return environ['woma.json']
+
 
 class Response(BaseResponse):
     """A webob.Response that can be initialized with defaults from request."""
 
+    # See woma.serializers
+    json_serializer = serializers.JSON
+
     @classmethod
     def for_request(cls, request):
         """Initialize a Response with defaults based on the request.
@@ -58,18 +315,182 @@ class Response(BaseResponse):
         'latin1'
 
         """
+        if not request.environ.get('CONTENT_TYPE'):
+            # The common case: skip parsing the defaults into headers
+            return cls(headerlist=[
+                ('Content-Type', 'text/plain; charset=UTF-8'),
+                ('Content-Length', '0'),
+            ])
         return cls(
             status_code=200,
             content_type=request.content_type or 'text/plain',
             charset=request.charset or 'UTF-8')
 
     def write(self, text):
-        """An alias for `response.text = text`.
+        """Append text (or bytes) to the body of the response.
 
         >>> response = Response()
         >>> response.write('some text')
+        >>> response.write(' and some more')
         >>> response.text
-        'some text'
+        'some text and some more'
+
+        Chunks are kept in a list (not joined) and Content-Length is kept up to
+        date as they are added. On a streaming response (see
+        ``Response.stream``), the chunk is sent after the streamed body.
+
+        """
+        if not self.streaming:
+            return super(Response, self).write(text)
+        self.app_iter = _append_chunk(self.app_iter, self._encode(text))
+
+    def write_json(self, obj):
+        """Replace the body with obj serialized as JSON.
+
+        The object is serialized straight to bytes, and the Content-Type is
+        set to ``application/json``.
+
+        >>> response = Response()
+        >>> response.write_json({'name': 'World'})
+        >>> response.content_type
+        'application/json'
+        >>> Request.blank('/', POST=response.body).json
+        {'name': 'World'}
+
+        """
+        self.body = self.json_serializer.dumps(obj)
+        self.content_type = 'application/json'
+
+    def stream(self, chunks, content_length=None):
+        """Stream the body from an iterable of text (or bytes) chunks.
+
+        Nothing is read from ``chunks`` until the server iterates over the
+        response, so a generator can produce a large body with bounded memory.
+
+        >>> def rows():
+        ...     yield 'id,name\\n'
+        ...     yield '1,Bob\\n'
+        ...
+        >>> response = Response()
+        >>> response.stream(rows())
+        >>> response.streaming
+        True
+        >>> response.body
+        b'id,name\\n1,Bob\\n'
+
+        Unless ``content_length`` is given, the response has no Content-Length
+        header, so the server will send it with chunked transfer encoding.
 
         """
-        self.text = text
+        self.app_iter = _encode_chunks(chunks, self._encode)
+        self.content_length = content_length
+
+    @property
+    def streaming(self):
+        """True if the body is an iterator instead of a list of chunks."""
+        return not isinstance(self.app_iter, (list, tuple))
+
+    def _encode(self, text):
+        if isinstance(text, bytes):
+            return text
+        if not self.charset:
+            raise TypeError(
+                'You can only write text to Response if charset has been set')
+        return text.encode(self.charset)
+
+
+class StaticResponse(object):
+    """A prerendered response, written straight to ``start_response``.
+
+    The status line, headers and body are built once, so sending it doesn't
+    build a Request or Response at all:
+
+    >>> gone = StaticResponse(410, 'This page is gone.\\n')
+    >>> Client(gone).get()
+    <Response at ... 410 Gone>
+
+    The body can echo the request's ``{path}`` or ``{method}``. Only those
+    parts are filled in for each request:
+
+    >>> missing = StaticResponse(404, "We can't find {path}\\n")
+    >>> Client(missing).get('/nothing/here').text
+    "We can't find /nothing/here\\n"
+
+    It's a WSGI app, so it can be a router's default (see
+    ``Router.setdefault``). It can also be given to an Endpoint instead of a
+    controller, in which case it's sent straight away unless there is
+    middleware to run. Then it's used as a controller (see
+    ``StaticResponse.controller``).
+
+    """
+
+    def __init__(self, status, body='', headers=(),
+                 content_type='text/plain; charset=UTF-8'):
+        if isinstance(status, int):
+            status = '%d %s' % (status, status_reasons[status])
+        self.status = status
+        self.headers = [('Content-Type', content_type)] + list(headers)
+        parts = _STATIC_FIELDS.split(body)
+        # static text alternates with the names of the fields to fill in
+        self.parts = [part if i % 2 else part.encode('utf-8')
+                      for i, part in enumerate(parts)]
+        if len(parts) == 1:
+            self.body = self.parts[0]
+            self.headerlist = tuple(
+                self.headers + [('Content-Length', str(len(self.body)))])
+        else:
+            self.body = self.headerlist = None
+
+    def __call__(self, environ, start_response):
+        body = self.body
+        if body is None:
+            body = self.render(environ)
+            start_response(self.status, self.headers + [
+                ('Content-Length', str(len(body)))])
+        else:
+            start_response(self.status, list(self.headerlist))
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        return [body]
+
+    def render(self, environ):
+        """Return the body for the request in environ."""
+        if self.body is not None:
+            return self.body
+        fields = {
+            'path': request_path(environ),
+            'method': environ['REQUEST_METHOD'],
+        }
+        return b''.join(
+            fields[part].encode('latin-1') if i % 2 else part
+            for i, part in enumerate(self.parts))
+
+    def controller(self, request, response):
+        """Write this response to ``response``, like a controller would."""
+        response.status = self.status
+        for name, value in self.headers:
+            response.headers[name] = value
+        response.body = self.render(request.environ)
+        return response
+
+
+def _append_chunk(chunks, chunk):
+    # like chain(chunks, [chunk]), but closing it closes chunks
+    try:
+        for previous in chunks:
+            yield previous
+        yield chunk
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def _encode_chunks(chunks, encode):
+    try:
+        for chunk in chunks:
+            yield encode(chunk)
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
@@ -0,0 +1,355 @@
+"""A segment-based index for finding the first value registered for a path.
+
+Paths are split on ``/`` into segments, and each segment is stored in a tree
+(a trie). A segment is either static text, a ``{name}`` placeholder that
+matches any non-empty segment, or anything else with placeholders (typed
+placeholders like ``{id:int}``, or static text mixed with placeholders like
+``{name}.json``), which is matched with a small per-segment regex. See
+`woma.converters` for the placeholder syntax.
+
+>>> index = RouteIndex()
+>>> index.add('/articles/{article_id:int}', 'show article')
+>>> index.add('/articles/{slug}', 'show article by slug')
+>>> index.lookup('/articles/3')
+('show article', {'article_id': 3})
+>>> index.lookup('/articles/hello-world')
+('show article by slug', {'slug': 'hello-world'})
+
+Values are returned in registration order, so the first value added for a
+matching path wins, just like scanning a list of routes:
+
+>>> index.add('/articles/new', 'new article')
+>>> index.lookup('/articles/new')
+('show article by slug', {'slug': 'new'})
+>>> index.lookup('/comments/3') is None
+True
+
+A lookup only visits the nodes along the path, so its cost grows with the
+depth of the path rather than with the number of values in the index.
+
+An index can be dumped to plain data (tuples, dicts, strings, numbers and
+None) that can be saved as JSON, and loaded again without parsing any
+templates:
+
+>>> copy = RouteIndex.load(index.dump(str.upper), str.lower)
+>>> copy.lookup('/articles/3')
+('show article', {'article_id': 3})
+
+"""
+import re
+
+from woma.converters import (CONVERTERS, PLACEHOLDER, StringConverter,
+                             compile_template, convert, parse_placeholder)
+from woma.exceptions import RouteError
+
+
+class RouteIndex(object):
+    """A trie of path segments mapping paths to values."""
+
+    def __init__(self):
+        self.root = _Node()
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, path, value):
+        """Add a value for the given path pattern.
+
+        The index is updated in place, so adding a value is cheap and there's
+        nothing to rebuild afterwards.
+
+        """
+        order = self.size
+        placeholders = []
+        node = self.root
+        node.first = min(node.first, order)
+        segments = path.split('/')
+        for i, segment in enumerate(segments):
+            if _spans_segments(segment):
+                # the rest of the path is matched as a whole
+                node = node.tail('/'.join(segments[i:]), placeholders)
+                node.first = min(node.first, order)
+                break
+            node = node.child(segment, placeholders)
+            node.first = min(node.first, order)
+        if not any(_converts(converter) for _, converter in placeholders):
+            # no need to call to_python for every match
+            placeholders = [(name, None) for name, _ in placeholders]
+        node.values.append((order, tuple(placeholders), value))
+        self.size += 1
+
+    def lookup(self, path):
+        """Return (value, kwargs) for the first match of path, or None."""
+        found = self.root.find(path.split('/'), 0, [], None)
+        if found is None:
+            return None
+        _, placeholders, value, captured = found
+        if placeholders and placeholders[0][1] is None:
+            return value, {
+                name: captured[i] for i, (name, _) in enumerate(placeholders)}
+        return value, convert(placeholders, captured)
+
+    def covering(self, path):
+        """Return the first value whose path matches everything path does.
+
+        That is, the value that would always be found instead of one added
+        for ``path``, or None. This errs on the side of None: it may miss
+        patterns that cover path in unusual ways, but never returns one that
+        doesn't.
+
+        >>> index = RouteIndex()
+        >>> index.add('/articles/{slug}', 'by slug')
+        >>> index.covering('/articles/{article_id:int}')
+        'by slug'
+        >>> index.covering('/articles/{article_id:int}/comments') is None
+        True
+
+        """
+        found = self.root.cover(path.split('/'), 0, None)
+        return None if found is None else found[1]
+
+    def dump(self, dump_value=None):
+        """Return the index as plain data, for RouteIndex.load.
+
+        ``dump_value`` turns each value into plain data too, e.g. a route
+        into its position in a list of routes.
+
+        """
+        converters = {id(converter): name
+                      for name, converter in CONVERTERS.items()}
+        return self.size, self.root.dump(dump_value, converters)
+
+    @classmethod
+    def load(cls, data, load_value=None):
+        """Return an index from RouteIndex.dump data.
+
+        ``load_value`` turns the dumped values back into values.
+
+        """
+        index = cls()
+        index.size, root = data
+        index.root = _Node.load(root, load_value, {})
+        return index
+
+
+class _Node(object):
+    """A node in the tree, holding the values for paths that end here."""
+
+    def __init__(self):
+        self.static = {}
+        self.dynamic = None
+        self.patterns = {}
+        self.tails = {}
+        self.values = []
+        # the registration order of the earliest value below this node
+        self.first = float('inf')
+
+    def dump(self, dump_value, converters):
+        values = []
+        for order, placeholders, value in self.values:
+            if dump_value is not None:
+                value = dump_value(value)
+            placeholders = tuple(
+                (name, _converter_name(converter, converters))
+                for name, converter in placeholders)
+            values.append((order, placeholders, value))
+        return (
+            {segment: node.dump(dump_value, converters)
+             for segment, node in self.static.items()},
+            None if self.dynamic is None else self.dynamic.dump(
+                dump_value, converters),
+            [(regex, node.dump(dump_value, converters))
+             for regex, (_, node) in self.patterns.items()],
+            [(regex, node.dump(dump_value, converters))
+             for regex, (_, node) in self.tails.items()],
+            values,
+            # infinity isn't valid JSON
+            None if self.first == float('inf') else self.first,
+        )
+
+    @classmethod
+    def load(cls, data, load_value, compiled):
+        static, dynamic, patterns, tails, values, first = data
+        node = cls()
+        node.static = {segment: cls.load(child, load_value, compiled)
+                       for segment, child in static.items()}
+        if dynamic is not None:
+            node.dynamic = cls.load(dynamic, load_value, compiled)
+        for children, dumped in ((node.patterns, patterns),
+                                 (node.tails, tails)):
+            for regex, child in dumped:
+                if regex not in compiled:
+                    compiled[regex] = re.compile('^%s$' % regex)
+                children[regex] = (
+                    compiled[regex], cls.load(child, load_value, compiled))
+        for order, placeholders, value in values:
+            if load_value is not None:
+                value = load_value(value)
+            placeholders = tuple(
+                (name, _load_converter(converter))
+                for name, converter in placeholders)
+            node.values.append((order, placeholders, value))
+        if first is not None:
+            node.first = first
+        return node
+
+    def child(self, segment, placeholders):
+        if not PLACEHOLDER.search(segment):
+            return self.static.setdefault(segment, _Node())
+
+        regex, found = compile_template(segment)
+        placeholders.extend(found)
+        if _is_placeholder(segment) and type(found[0][1]) is StringConverter:
+            if self.dynamic is None:
+                self.dynamic = _Node()
+            return self.dynamic
+
+        return self._regex_child(self.patterns, regex, placeholders)
+
+    def tail(self, template, placeholders):
+        regex, found = compile_template(template)
+        placeholders.extend(found)
+        return self._regex_child(self.tails, regex, placeholders)
+
+    def _regex_child(self, children, regex, placeholders):
+        if regex not in children:
+            children[regex] = (re.compile('^%s$' % regex), _Node())
+        return children[regex][1]
+
+    def find(self, segments, depth, captured, best):
+        """Return the earliest (order, placeholders, value, captured) below.
+
+        ``best`` is the earliest match found so far. Any subtree whose earliest
+        value was registered after it can't improve on it and is skipped.
+
+        """
+        if best is not None and self.first >= best[0]:
+            return best
+
+        if depth == len(segments):
+            # self.first may be the order of a value further down the tree
+            if self.values and (best is None or self.values[0][0] < best[0]):
+                order, placeholders, value = self.values[0]
+                return order, placeholders, value, list(captured)
+            return best
+
+        segment = segments[depth]
+        static = self.static.get(segment)
+        if static is not None:
+            best = static.find(segments, depth + 1, captured, best)
+
+        if segment:
+            for regex, node in self.patterns.values():
+                best = _find_regex(
+                    regex, segment, node, segments, depth + 1, captured, best)
+
+            if self.dynamic is not None:
+                captured.append(segment)
+                best = self.dynamic.find(segments, depth + 1, captured, best)
+                captured.pop()
+
+            if self.tails:
+                rest = '/'.join(segments[depth:])
+                for regex, node in self.tails.values():
+                    best = _find_regex(
+                        regex, rest, node, segments, len(segments), captured,
+                        best)
+
+        return best
+
+    def cover(self, segments, depth, best):
+        """Return the earliest (order, value) covering the template segments.
+
+        This is like ``find``, but for a path template instead of a path.
+
+        """
+        if best is not None and self.first >= best[0]:
+            return best
+
+        if depth == len(segments):
+            if self.values and (best is None or self.values[0][0] < best[0]):
+                order, _, value = self.values[0]
+                return order, value
+            return best
+
+        segment = segments[depth]
+        rest = '/'.join(segments[depth:])
+        if not PLACEHOLDER.search(segment):
+            static = self.static.get(segment)
+            if static is not None:
+                best = static.cover(segments, depth + 1, best)
+            if segment:
+                for regex, node in self.patterns.values():
+                    if regex.match(segment):
+                        best = node.cover(segments, depth + 1, best)
+            if segment and not PLACEHOLDER.search(rest):
+                for regex, node in self.tails.values():
+                    if regex.match(rest):
+                        best = node.cover(segments, len(segments), best)
+        elif _spans_segments(segment):
+            key = compile_template(rest)[0]
+            if key in self.tails:
+                best = self.tails[key][1].cover(segments, len(segments), best)
+            # nothing else can match a segment that may contain slashes
+            return best
+        else:
+            key = compile_template(segment)[0]
+            if key in self.patterns:
+                best = self.patterns[key][1].cover(segments, depth + 1, best)
+
+        if segment and self.dynamic is not None:
+            best = self.dynamic.cover(segments, depth + 1, best)
+        if segment and _ANY_TAIL in self.tails:
+            # a bare {name:path} matches the rest of any path
+            node = self.tails[_ANY_TAIL][1]
+            best = node.cover(segments, len(segments), best)
+        return best
+
+
+_ANY_TAIL = compile_template('{rest:path}')[0]
+
+
+def _find_regex(regex, text, node, segments, depth, captured, best):
+    if best is not None and node.first >= best[0]:
+        return best
+    match = regex.match(text)
+    if not match:
+        return best
+    groups = match.groups()
+    captured.extend(groups)
+    best = node.find(segments, depth, captured, best)
+    del captured[len(captured) - len(groups):]
+    return best
+
+
+def _spans_segments(segment):
+    return any(parse_placeholder(placeholder)[1].spans_segments
+               for placeholder in PLACEHOLDER.findall(segment))
+
+
+def _is_placeholder(segment):
+    match = PLACEHOLDER.match(segment)
+    return match is not None and match.end() == len(segment)
+
+
+def _converter_name(converter, converters):
+    # None marks placeholders that are passed on without conversion
+    if converter is None:
+        return None
+    if id(converter) not in converters:
+        raise RouteError('%r is not in woma.converters.CONVERTERS' % (
+            converter,))
+    return converters[id(converter)]
+
+
+def _load_converter(name):
+    if name is None:
+        return None
+    if name not in CONVERTERS:
+        raise RouteError('Unknown converter %r' % name)
+    return CONVERTERS[name]
+
+
+def _converts(converter):
+    return type(converter).to_python is not StringConverter.to_python
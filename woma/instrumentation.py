@@ -0,0 +1,124 @@
+"""Timing hooks for the parts of handling a request.
+
+A hook is any callable that accepts a Span. Register hooks on a Router to
+time every request it handles, or on a single Endpoint:
+
+>>> from woma.http import Client
+>>> from woma.router import Router
+>>> spans = []
+>>> router = Router()
+>>> router.add('/hello/{name}', get=lambda request, response: response)
+>>> router.add_hook(spans.append)
+>>> Client(router).get('/hello/World').body
+b''
+>>> [(span.name, span.route) for span in spans]
+... # doctest: +NORMALIZE_WHITESPACE
+[('route', '/hello/{name}'), ('request', '/hello/{name}'),
+ ('controller', '/hello/{name}'), ('response', '/hello/{name}')]
+
+The spans are:
+
+- route: finding the route for the path (``Routes.match``).
+- request: creating the Request and Response for the controller.
+- controller: running the controller.
+- response: the server iterating over the response body, emitted once the
+  body is exhausted or closed.
+
+Spans are tagged with the path of the matched route (e.g.
+``'/hello/{name}'``) rather than the requested path, so they can be grouped
+into a small number of metrics. When no hooks are registered, the only cost
+is checking for them.
+
+"""
+import time
+from collections import namedtuple
+
+clock = time.perf_counter
+
+
+class Span(namedtuple('Span', ['name', 'route', 'start', 'duration'])):
+    """A timed part of a request, with the start and duration in seconds."""
+
+    __slots__ = ()
+
+
+class Spans(object):
+    """Emits consecutive spans for one request to a list of hooks."""
+
+    def __init__(self, hooks, route):
+        self.hooks = hooks
+        self.route = route
+        self.last = clock()
+
+    @classmethod
+    def for_environ(cls, environ, hooks):
+        """Return Spans for the request in environ, or None if not needed.
+
+        ``hooks`` are added to any registered by the router for the request.
+
+        """
+        router_hooks = environ.get('woma.hooks')
+        if router_hooks:
+            hooks = hooks + router_hooks if hooks else router_hooks
+        if not hooks:
+            return None
+        route = environ.get('router.route')
+        return cls(hooks, getattr(route, 'path', None))
+
+    def restart(self):
+        """Start the next span now."""
+        self.last = clock()
+
+    def mark(self, name):
+        """End the current span, naming it, and start the next one."""
+        now = clock()
+        emit(self.hooks, Span(name, self.route, self.last, now - self.last))
+        self.last = now
+
+    def wrap(self, app_iter, name):
+        """Return app_iter, timing iteration over it as a span."""
+        return _TimedIterator(app_iter, self.hooks, Span(name, self.route,
+                                                         clock(), 0))
+
+
+def emit(hooks, span):
+    for hook in hooks:
+        hook(span)
+
+
+class _TimedIterator(object):
+    # Emits the span once the body is exhausted or closed, whichever is first
+    def __init__(self, app_iter, hooks, span):
+        self.app_iter = app_iter
+        self.iterator = iter(app_iter)
+        self.hooks = hooks
+        self.span = span
+        self.elapsed = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        start = clock()
+        try:
+            return next(self.iterator)
+        except StopIteration:
+            self._emit(start)
+            raise
+        finally:
+            self.elapsed += clock() - start
+
+    def close(self):
+        start = clock()
+        try:
+            close = getattr(self.app_iter, 'close', None)
+            if close is not None:
+                close()
+        finally:
+            self._emit(start)
+
+    def _emit(self, start):
+        if self.span is not None:
+            duration = self.elapsed + clock() - start
+            emit(self.hooks, self.span._replace(duration=duration))
+            self.span = None
@@ -0,0 +1,52 @@
+"""Middleware for controllers.
+
+A handler is anything with the controller interface: it accepts a request
+and response and returns a response. A middleware is a callable that accepts
+a handler and returns a new handler, usually one that does something before
+and/or after calling the handler it was given:
+
+>>> def add_server_header(handler):
+...     def handler_with_server_header(request, response):
+...         response = handler(request, response)
+...         response.headers['Server'] = 'woma'
+...         return response
+...     return handler_with_server_header
+...
+
+Add middleware to every endpoint of a router with ``router.use``, or to a
+single endpoint with its ``middleware`` argument:
+
+>>> from woma.http import Client
+>>> from woma.router import Router
+>>> router = Router()
+>>> router.add('/hello', get=lambda request, response: response)
+>>> router.use(add_server_header)
+>>> Client(router).get('/hello').headers['Server']
+'woma'
+
+Middleware is composed with each controller once, not on every request, so
+every layer is just a function call while handling a request. Router
+middleware wraps endpoint middleware, and the first middleware given is the
+outermost. Middleware runs on the same Request and Response objects as the
+controller.
+
+Middleware also wraps ``async def`` controllers. In that case the handler
+it's given returns an awaitable, so the middleware must be async too.
+
+"""
+
+
+def compose(middleware, controller):
+    """Return a handler calling controller through each middleware in turn.
+
+    >>> def shout(handler):
+    ...     return lambda request, response: handler(request, response) + '!'
+    ...
+    >>> compose([shout, shout], lambda request, response: 'hi')(None, None)
+    'hi!!'
+
+    """
+    handler = controller
+    for layer in reversed(middleware):
+        handler = layer(handler)
+    return handler
@@ -1,10 +1,26 @@
 import re
+import threading
+from collections import OrderedDict, namedtuple
+from urllib.parse import quote
 
 from property_caching import cached_property
-from webob import Request
 
+from woma.converters import (PLACEHOLDER, compile_template, convert,
+                             parse_placeholder)
 from woma.endpoints import Endpoint, not_found
-from woma.exceptions import NotFound
+from woma.exceptions import BuildError, NotFound, RouteError
+from woma.http import Request, request_path
+from woma.index import RouteIndex
+from woma.instrumentation import Span, clock, emit
+
+# values made of these characters are the same after url quoting
+_NEEDS_NO_QUOTING = re.compile(r'^[A-Za-z0-9_.~-]*$')
+
+# the placeholder capturing the rest of the path below a mounted router
+MOUNT_PATH = '_mount_path'
+
+# longer paths aren't worth keeping in a Routes cache
+_MAX_CACHED_PATH = 512
 
 
 class Router(object):
@@ -32,7 +48,63 @@ class Router(object):
     When the controller is called, the passed ``request`` object will have a
     ``kwargs`` property that holds a dict of the values passed in the dynamic
     parts of the URL. For example, on requests to ``/articles/3``,
-    the incoming ``request.kwargs`` will be ``{'article_id': 3}``.
+    the incoming ``request.kwargs`` will be ``{'article_id': '3'}``.
+
+    Dynamic segments can be typed with a converter:
+
+        router.add('/articles/{article_id:int}', get=get_article)
+
+    Now only paths like ``/articles/3`` match, and ``request.kwargs`` will be
+    ``{'article_id': 3}``. The converters are ``str`` (the default), ``int``,
+    ``uuid`` and ``path`` (which also matches ``/``). See `woma.converters`.
+
+    Building URLs
+    --------------
+
+    Give a route a name to build paths for it, rather than formatting them
+    by hand:
+
+        router.add('/articles/{article_id:int}', get=get_article,
+                   name='article')
+        router.url_for('article', article_id=3)  # '/articles/3'
+
+    Middleware
+    -----------
+
+    Wrap every controller in the router with middleware:
+
+        router.use(authenticate, add_cors_headers)
+
+    See `woma.middleware` for details.
+
+    Route tables
+    -------------
+
+    Load many routes at once, with controllers imported on first use:
+
+        router = Router.from_table({
+            '/articles': {'get': 'app.articles:index', 'name': 'articles'},
+            '/articles/{article_id:int}': 'app.articles:article',
+        })
+
+    To skip building the lookups on every start, compile the table once
+    (e.g. when deploying) and load the compiled file in each worker:
+
+        compile_table(table, 'routes.compiled')
+        router = Router.from_compiled('routes.compiled', table)
+
+    See `woma.tables` for details.
+
+    Mounting routers
+    -----------------
+
+    Split a large app into routers and mount them under a path prefix:
+
+        api = Router()
+        api.add('/articles', get=list_articles)
+        router.mount('/api/v2', api)
+
+    Requests to ``/api/v2/articles`` are routed to ``api``. See Router.mount.
 
     Low-level API
     --------------
@@ -53,7 +125,12 @@ class Router(object):
 
     **WSGI:**
 
-    Routers are WSGI callables. See `woma.router.Route.__call__` for details.
+    Routers are WSGI callables. See `woma.router.Router.__call__` for details.
+
+    **ASGI:**
+
+    ``router.asgi`` is an ASGI application for the same routes. Controllers
+    can be ``async def`` functions. See `woma.asgi` for details.
 
     """
 
@@ -64,8 +141,41 @@ class Router(object):
 
         """
         self.routes = routes or Routes()
+        self.hooks = []
+        self.middleware = ()
         self.setdefault(not_found)
 
+    @classmethod
+    def from_table(cls, table, lazy=True):
+        """Return a router with the routes in table. See `woma.tables`."""
+        from woma.tables import load_table
+        router = cls()
+        load_table(router, table, lazy)
+        return router
+
+    @classmethod
+    def from_file(cls, filename, lazy=True):
+        """Return a router with the routes in a JSON file.
+
+        The file holds a table like the one for Router.from_table.
+
+        """
+        from woma.tables import load_file
+        router = cls()
+        load_file(router, filename, lazy)
+        return router
+
+    @classmethod
+    def from_compiled(cls, filename, table=None, lazy=True, cache_size=0):
+        """Return a router with the routes in a compiled table file.
+
+        See `woma.tables.compile_table`. If ``table`` is given, raises
+        woma.exceptions.RouteError unless the file was compiled from it.
+
+        """
+        from woma.tables import load_compiled
+        return cls(load_compiled(filename, table, lazy, cache_size))
+
     @property
     def add(self):
         """router.add is an alias for router.map_controllers"""
@@ -86,7 +196,7 @@ class Router(object):
         """
         self.routes.add(route)
 
-    def map_endpoint(self, path, endpoint):
+    def map_endpoint(self, path, endpoint, name=None):
         """Map the path to the given endpoint.
 
         - path: a string representing a URL path. e.g. '/articles'.
@@ -97,11 +207,14 @@ class Router(object):
         - endpoint: any valid wsgi app.
           e.g. an instance of woma.endpoints.Endpoint
 
+        - name: an optional name for the route, for use with Router.url_for.
+
         """
-        route = Route(path, endpoint)
+        route = Route(path, endpoint, name)
         self.add_route(route)
 
-    def map_controllers(self, path, default_controller=None, **controllers):
+    def map_controllers(self, path, default_controller=None, name=None,
+                        **controllers):
         """Create an endpoint for the given controllers and add it to router.
 
         Example:
@@ -117,7 +230,50 @@ class Router(object):
 
         """
         endpoint = Endpoint(default_controller, **controllers)
-        self.map_endpoint(path, endpoint)
+        self.map_endpoint(path, endpoint, name)
+
+    def url_for(self, name, **kwargs):
+        """Return the path of the route with the given name.
+
+        The kwargs fill in the route's dynamic segments:
+
+            router.add('/articles/{article_id:int}', get=show, name='article')
+            router.url_for('article', article_id=3)  # '/articles/3'
+
+        Values are converted with the segment's converter, checked against
+        it, and url-quoted. woma.exceptions.BuildError is raised if there is
+        no such route or the kwargs don't fit it. See Route.build.
+
+        """
+        return self.routes.url_for(name, **kwargs)
+
+    def mount(self, prefix, router):
+        """Route every path below prefix to another router.
+
+        The other router's routes are relative to the prefix:
+
+            api = Router()
+            api.add('/articles', get=list_articles)
+            router.mount('/api/v2', api)
+
+        Now ``/api/v2/articles`` is routed to ``list_articles``, with the
+        prefix moved from ``PATH_INFO`` to ``SCRIPT_NAME``. The prefix itself
+        (with or without a trailing slash) is routed to the other router's
+        ``/`` route, and paths it doesn't route get its default endpoint.
+
+        The prefix is one route in this router, so paths outside of it never
+        reach the other router. It can have dynamic segments, which are added
+        to ``request.kwargs``. This router's middleware wraps the other
+        router's middleware.
+
+        """
+        if not prefix.startswith('/') or prefix.endswith('/'):
+            raise RouteError(
+                'Mount prefix must start and not end with /: %r' % prefix)
+        mount = Mount(router)
+        self.map_endpoint(prefix, mount)
+        self.map_endpoint(prefix + '/', mount)
+        self.map_endpoint('%s/{%s:path}' % (prefix, MOUNT_PATH), mount)
 
     def setdefault(self, endpoint):
         """Set the default endpoint to use for unmatched paths."""
@@ -134,24 +290,294 @@ class Router(object):
         Dynamic path segments are added as a ``'router.kwargs'`` key to the
         ``environ`` before passing it to the endpoint. The endpoint is the
         thing that turns that into ``request.kwargs`` when calling controllers.
+        The matched Route is added as ``'router.route'``.
+
+        The path is read straight from the ``environ``; no request object is
+        built until the endpoint needs one.
+
+        """
+        endpoint = self.endpoint_for(environ)
+        return endpoint(environ, start_response)
+
+    def endpoint_for(self, environ, path=None):
+        """Return the endpoint for the path in environ.
+
+        This is the routing half of ``Router.__call__``, shared with
+        `woma.asgi.ASGIApp`: it adds ``'router.kwargs'`` to the ``environ``
+        but does not call the endpoint. Mounted routers are followed to the
+        endpoint they route to.
+
+        ``path`` is the path to route, if not the one in environ.
+
+        """
+        if self.hooks:
+            start = clock()
+        if path is None:
+            path = request_path(environ)
+        match = self.routes.match(path)
+        environ['router.kwargs'] = match.kwargs
+        environ['router.route'] = match.route
+        if self.middleware:
+            environ['woma.middleware'] = self.middleware
+        if self.hooks:
+            environ['woma.hooks'] = self.hooks
+            emit(self.hooks, Span('route', match.route.path, start,
+                                  clock() - start))
+        endpoint = match.route.endpoint
+        if type(endpoint) is Mount:
+            return endpoint.endpoint_for(environ)
+        return endpoint
+
+    def use(self, *middleware):
+        """Wrap the controllers of every endpoint in the router in middleware.
+
+        This applies to endpoints added before and after calling ``use``.
+        See `woma.middleware` for details.
+
+        """
+        self.middleware = self.middleware + middleware
+
+    def finalize(self):
+        """Compose the router's middleware with every endpoint's controllers.
+
+        Otherwise that happens on the first request to each endpoint. Call
+        this once the routes are set up, e.g. before forking workers.
+
+        """
+        _compile_routes(self.routes, self.middleware)
+
+    def warmup(self):
+        """Do the work that otherwise happens on the first requests.
+
+        That's composing middleware (see Router.finalize), importing modules
+        that are only imported when needed (e.g. asyncio for ``async def``
+        controllers, or controllers loaded from a table), and a first run
+        through routing, an endpoint and the response code, which is much
+        slower than the ones after it. No controllers, middleware or hooks
+        are called. Call this once the routes are set up and before forking
+        workers, so they share the result and serve their first requests as
+        fast as the rest.
+
+        """
+        self.finalize()
+        self.routes.warmup()
+
+        def start_response(status, headers):
+            pass
+
+        # a method nothing allows is rejected before controllers, middleware
+        # and hooks, so only the routing and the 405 response run
+        for path in ('/', '/woma/warmup'):
+            environ = Request.blank(path, method='WARMUP').environ
+            route = self.routes.match(path).route
+            environ['router.kwargs'] = {}
+            environ['router.route'] = route
+            if isinstance(route.endpoint, Endpoint):
+                b''.join(route.endpoint(environ, start_response))
+
+        # and an endpoint of our own runs the request and response code
+        environ = Request.blank('/', method='GET').environ
+        environ['router.kwargs'] = {}
+        b''.join(Endpoint(_warmup_controller)(environ, start_response))
+
+    def freeze(self, strict=False):
+        """Finalize the router and lock its routes.
+
+        This composes middleware (see Router.finalize) and rebuilds the route
+        lookups without routes that can never match. Adding routes afterwards
+        raises woma.exceptions.RouteError. Returns a RouteReport of the routes
+        that can never match, and if ``strict`` is True, raises RouteError if
+        there are any.
+
+        """
+        self.finalize()
+        report = self.routes.freeze()
+        if strict and report:
+            raise RouteError('Unmatchable routes:\n%s' % (report,))
+        return report
+
+    def add_hook(self, hook):
+        """Add a timing hook for every request handled by this router.
+
+        A hook is a callable accepting a `woma.instrumentation.Span`. Hooks
+        added here are also called for the endpoint's spans. See
+        `woma.instrumentation` for details.
+
+        """
+        self.hooks.append(hook)
+
+    @cached_property
+    def asgi(self):
+        """An ASGI application serving this router. See `woma.asgi`."""
+        from woma.asgi import ASGIApp
+        return ASGIApp(self)
+
+
+class Mount(object):
+    """An endpoint routing the rest of the path with another router.
+
+    See Router.mount.
+
+    """
+
+    def __init__(self, router):
+        self.router = router
+        self._middleware = (None, None, None)
+
+    def __call__(self, environ, start_response):
+        endpoint = self.endpoint_for(environ)
+        return endpoint(environ, start_response)
+
+    def endpoint_for(self, environ):
+        """Return the endpoint the mounted router routes environ to.
+
+        The mount prefix is moved from ``PATH_INFO`` to ``SCRIPT_NAME``, and
+        the ``'router.*'`` and ``'woma.*'`` keys are combined with the ones
+        added by the outer router.
 
         """
-        request = Request(environ)
-        route = self.routes.get(request.path)
-        environ['router.kwargs'] = route.kwargs
-        return route.endpoint(environ, start_response)
+        kwargs = environ.get('router.kwargs') or {}
+        rest = kwargs.pop(MOUNT_PATH, None)
+        full_path = (environ.get('SCRIPT_NAME', '') +
+                     environ.get('PATH_INFO', ''))
+        if rest is None:
+            path_info = '/' if full_path.endswith('/') else ''
+        else:
+            # quoting keeps the slashes, so count segments in the raw path
+            segments = full_path.split('/')
+            path_info = '/' + '/'.join(segments[-(rest.count('/') + 1):])
+        environ['SCRIPT_NAME'] = full_path[:len(full_path) - len(path_info)]
+        environ['PATH_INFO'] = path_info
+
+        middleware = environ.get('woma.middleware')
+        hooks = environ.get('woma.hooks')
+        router = self.router
+        endpoint = router.endpoint_for(environ, '/' + (rest or ''))
+        if kwargs:
+            kwargs.update(environ['router.kwargs'])
+            environ['router.kwargs'] = kwargs
+        if middleware and router.middleware:
+            environ['woma.middleware'] = self.middleware_for(middleware)
+        if hooks and router.hooks:
+            environ['woma.hooks'] = hooks + router.hooks
+        return endpoint
+
+    def middleware_for(self, outer):
+        """Return outer middleware followed by the mounted router's."""
+        inner = self.router.middleware
+        if not outer:
+            return inner
+        if not inner:
+            return outer
+        cached_outer, cached_inner, combined = self._middleware
+        if cached_outer is not outer or cached_inner is not inner:
+            combined = outer + inner
+            self._middleware = (outer, inner, combined)
+        return combined
+
+    def compile(self, outer):
+        """Compose middleware with the mounted router's endpoints."""
+        _compile_routes(self.router.routes, self.middleware_for(outer))
+
+
+def _warmup_controller(request, response):
+    response.write('warm')
+    return response
+
+
+def _compile_routes(routes, middleware):
+    for route in routes.routes + [routes.default]:
+        if isinstance(route.endpoint, (Endpoint, Mount)):
+            route.endpoint.compile(middleware)
 
 
 class Routes(object):
-    """A collection of Route objects."""
+    """A collection of Route objects.
+
+    Routes without dynamic segments are kept in a dict, so finding one is a
+    single lookup. Dynamic routes are indexed by path segment (see
+    `woma.index.RouteIndex`), so finding one doesn't require trying every
+    route in turn. When more than one route matches a path, the first one
+    added wins.
+
+    Once all the routes are added, ``routes.freeze()`` reports routes that
+    can never match and rebuilds the lookup structures without them.
+
+    With a ``cache_size``, the matches for up to that many dynamic paths are
+    kept in a least-recently-used cache, so repeat requests for a path skip
+    the index. A path is only cached the second time it misses, and paths
+    that don't match are never cached, so one-off requests (e.g. for random
+    paths) can't push out the popular ones. ``hits`` and ``misses`` count
+    cache lookups:
+
+    >>> routes = Routes(cache_size=1000)
+    >>> routes.add(Route('/hello/{name}', 'hello'))
+    >>> routes.match('/hello/World')
+    RouteMatch(route=Route(path=/hello/{name}), kwargs={'name': 'World'})
+    >>> routes.match('/hello/World').kwargs
+    {'name': 'World'}
+    >>> routes.match('/hello/World').kwargs
+    {'name': 'World'}
+    >>> routes.hits, routes.misses
+    (1, 2)
 
-    def __init__(self):
+    """
+
+    def __init__(self, cache_size=0):
         self.routes = []
+        self.names = {}
+        self.static = {}
+        self.index = RouteIndex()
         self.default = None
+        self.frozen = False
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._dynamic = False
+        self._cache = OrderedDict()
+        # paths that missed once, to be cached if they miss again
+        self._seen = OrderedDict()
+        self._lock = threading.Lock()
 
     def add(self, route):
-        """Add a Route object to the collection."""
+        """Add a Route object to the collection.
+
+        Raises woma.exceptions.RouteError if the routes are frozen.
+
+        """
+        if self.frozen:
+            raise RouteError('Cannot add %r to frozen routes' % route)
+        self.clear_cache()
+        if route.name is not None:
+            if route.name in self.names:
+                raise RouteError('Duplicate route name: %s' % route.name)
+            self.names[route.name] = route
         self.routes.append(route)
+        if PLACEHOLDER.search(route.path):
+            self.index.add(route.path, route)
+            self._dynamic = True
+        elif route.path not in self.static:
+            # A dynamic route added earlier takes precedence for this path,
+            # and will be found in the index instead.
+            if self.index.lookup(route.path) is None:
+                self.static[route.path] = route
+
+    def extend(self, routes):
+        """Add many Route objects, in order.
+
+        Raises woma.exceptions.RouteError, without adding any of them, if a
+        name is used more than once.
+
+        """
+        routes = list(routes)
+        names = set(self.names)
+        for route in routes:
+            if route.name is not None:
+                if route.name in names:
+                    raise RouteError('Duplicate route name: %s' % route.name)
+                names.add(route.name)
+        for route in routes:
+            self.add(route)
 
     def get(self, path):
         """Return the Route object that matches the given path.
@@ -160,13 +586,174 @@ class Routes(object):
         woma.exceptions.NotFound will be raised.
 
         """
+        return self.match(path).route
+
+    def match(self, path):
+        """Return a RouteMatch for the route that matches the given path.
+
+        The match holds the route and the dynamic path segments captured from
+        this path. Nothing is stored on the route itself, so the same routes
+        can be matched from many threads at once.
+
+        If no match is found, a match for the default route (with no kwargs)
+        will be returned, otherwise woma.exceptions.NotFound will be raised.
+
+        """
+        route = self.static.get(path)
+        if route is not None:
+            return RouteMatch(route, {})
+        if self._dynamic:
+            if self.cache_size:
+                found = self._cached_lookup(path)
+            else:
+                found = self.index.lookup(path)
+            if found is not None:
+                return RouteMatch(*found)
+        return RouteMatch(self._not_found(path), {})
+
+    @property
+    def hit_rate(self):
+        """The fraction of cache lookups that were hits."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear_cache(self):
+        """Drop every cached match."""
+        with self._lock:
+            self._cache.clear()
+            self._seen.clear()
+
+    def _cached_lookup(self, path):
+        with self._lock:
+            found = self._cache.get(path)
+            if found is not None:
+                self._cache.move_to_end(path)
+                self.hits += 1
+                route, kwargs = found
+                # callers may change kwargs, so each match gets its own dict
+                return route, dict(kwargs)
+            self.misses += 1
+
+        found = self.index.lookup(path)
+        if found is not None and len(path) <= _MAX_CACHED_PATH:
+            route, kwargs = found
+            with self._lock:
+                if self._seen.pop(path, None) is None:
+                    self._seen[path] = True
+                    if len(self._seen) > self.cache_size:
+                        self._seen.popitem(last=False)
+                else:
+                    self._cache[path] = (route, dict(kwargs))
+                    if len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+        return found
+
+    def freeze(self):
+        """Lock the routes, and rebuild the lookups without unmatchable routes.
+
+        Returns a RouteReport of the routes that can never match because an
+        earlier route matches every path they do. Those are left out of the
+        lookups, and adding more routes raises woma.exceptions.RouteError.
+
+        >>> routes = Routes()
+        >>> routes.add(Route('/posts/{slug}', 'by slug'))
+        >>> routes.add(Route('/posts/{id:int}', 'by id'))
+        >>> routes.add(Route('/posts/{slug}', 'by slug again'))
+        >>> print(routes.freeze())
+        Route(path=/posts/{id:int}) is shadowed by Route(path=/posts/{slug})
+        Route(path=/posts/{slug}) duplicates Route(path=/posts/{slug})
+
+        """
+        report = RouteReport([], [])
+        static = {}
+        index = RouteIndex()
         for route in self.routes:
-            if route.match(path):
-                return route
-        return self._not_found(path)
+            if not PLACEHOLDER.search(route.path):
+                earlier = static.get(route.path)
+                if earlier is not None:
+                    report.duplicates.append((route, earlier))
+                    continue
+                found = index.lookup(route.path)
+                if found is not None:
+                    report.shadowed.append((route, found[0]))
+                    continue
+                static[route.path] = route
+                continue
+
+            earlier = index.covering(route.path)
+            if earlier is None:
+                index.add(route.path, route)
+            elif _same_pattern(route, earlier):
+                report.duplicates.append((route, earlier))
+            else:
+                report.shadowed.append((route, earlier))
+
+        self.static = static
+        self.index = index
+        self._dynamic = len(index) > 0
+        self.frozen = True
+        self.clear_cache()
+        return report
+
+    def dump(self):
+        """Return the lookups as plain data, for Routes.load.
+
+        Routes are referred to by their position in ``routes.routes``, so the
+        routes themselves have to be saved separately.
+
+        """
+        positions = {id(route): i for i, route in enumerate(self.routes)}
+
+        def position(route):
+            return positions[id(route)]
+        return {
+            'static': {path: position(route)
+                       for path, route in self.static.items()},
+            'index': self.index.dump(position),
+            'frozen': self.frozen,
+        }
+
+    @classmethod
+    def load(cls, routes, data, cache_size=0):
+        """Return Routes with the given routes and Routes.dump data.
+
+        Nothing is checked or compiled from the routes' paths, so loading
+        many routes this way is much faster than adding them.
+
+        """
+        loaded = cls(cache_size)
+        loaded.routes = list(routes)
+        for route in loaded.routes:
+            if route.name is not None:
+                loaded.names[route.name] = route
+        loaded.static = {path: loaded.routes[i]
+                         for path, i in data['static'].items()}
+        loaded.index = RouteIndex.load(
+            data['index'], loaded.routes.__getitem__)
+        loaded._dynamic = len(loaded.index) > 0
+        loaded.frozen = data['frozen']
+        return loaded
+
+    def url_for(self, name, **kwargs):
+        """Return the path built from the route with the given name.
+
+        Raises woma.exceptions.BuildError if there is no such route.
+
+        """
+        route = self.names.get(name)
+        if route is None:
+            raise BuildError('No route named %s' % name)
+        return route.build(**kwargs)
+
+    def warmup(self):
+        """Prepare every route's endpoint for requests. See Router.warmup."""
+        for route in self.routes + [self.default]:
+            if route is not None:
+                route.warmup()
 
     def setdefault(self, route):
         """Set default route to use when requesting a path with no match."""
+        self.clear_cache()
         self.default = route
 
     def _not_found(self, path):
@@ -175,6 +762,27 @@ class Routes(object):
         raise NotFound('No route found for %s' % path)
 
 
+class RouteReport(namedtuple('RouteReport', ['duplicates', 'shadowed'])):
+    """Routes that can never match, as (route, earlier route) pairs.
+
+    - duplicates: routes with the same path pattern as an earlier route.
+    - shadowed: routes whose paths all match a different earlier route.
+
+    A report is true if there are any problems.
+
+    """
+
+    __slots__ = ()
+
+    def __bool__(self):
+        return bool(self.duplicates or self.shadowed)
+
+    def __str__(self):
+        lines = ['%r is shadowed by %r' % pair for pair in self.shadowed]
+        lines.extend('%r duplicates %r' % pair for pair in self.duplicates)
+        return '\n'.join(lines)
+
+
 class Route(object):
     """An object representing a path to an endpoint.
 
@@ -183,51 +791,117 @@ class Route(object):
 
     >>> def my_app(): return 'Hello from my app!'
     >>> route = Route('/my/app', my_app)
-    >>> route.match('/your/app')
-    False
-    >>> route.match('/my/app')
+    >>> route.match('/your/app') is None
     True
+    >>> route.match('/my/app')
+    RouteMatch(route=Route(path=/my/app), kwargs={})
     >>> route.endpoint()
     'Hello from my app!'
 
     Paths can contain dynamic segments:
 
     >>> route = Route('/articles/{article_id}', my_app)
-    >>> route.match('/articles/123')
-    True
-    >>> route.kwargs
+    >>> route.match('/articles/123').kwargs
     {'article_id': '123'}
 
+    Paths can also be built from a route:
+
+    >>> route.build(article_id=123)
+    '/articles/123'
+
     """
 
-    def __init__(self, path, endpoint):
+    def __init__(self, path, endpoint, name=None):
         self.path = path
         self.endpoint = endpoint
-        self.kwargs = {}
+        self.name = name
 
     def __eq__(self, other):
-        return [self.path, self.endpoint] == [other.path, other.endpoint]
+        return ([self.path, self.endpoint, self.name] ==
+                [other.path, other.endpoint, other.name])
 
     def __repr__(self):
         return 'Route(path=%s)' % self.path
 
+    def warmup(self):
+        """Prepare the route's endpoint for requests. See Router.warmup."""
+        endpoint = self.endpoint
+        if isinstance(endpoint, Mount):
+            endpoint.router.routes.warmup()
+        elif isinstance(endpoint, Endpoint):
+            endpoint.warmup()
+
     @cached_property
     def _path_regex(self):
-        # this is a very naive conversion of a path into a regex...
-        pattern = self.path.replace('{', '(?P<').replace('}', '>[^/]+)')
-        return re.compile(r'^%s$' % pattern)
+        regex, placeholders = compile_template(self.path)
+        return re.compile(r'^%s$' % regex), placeholders
+
+    @cached_property
+    def _builder(self):
+        parts = []
+        for i, part in enumerate(PLACEHOLDER.split(self.path)):
+            if not i % 2:
+                parts.append(part)
+                continue
+            name, converter = parse_placeholder(part)
+            regex = re.compile('^(?:%s)$' % converter.regex)
+            safe = '/' if converter.spans_segments else ''
+            parts.append((name, converter, regex, safe))
+        return parts
+
+    def build(self, **kwargs):
+        """Return a path for this route, filling in the dynamic segments.
+
+        Each value is converted with its segment's converter (``to_url``),
+        checked against what the segment matches, and url-quoted. Raises
+        woma.exceptions.BuildError if a value is missing or doesn't fit.
+
+        >>> route = Route('/files/{id:int}/{name}', None)
+        >>> route.build(id=3, name='my file.txt')
+        '/files/3/my%20file.txt'
+        >>> route.build(id='three', name='file.txt')
+        Traceback (most recent call last):
+        ...
+        BuildError: 'three' is not a valid value for {id} in /files/...
+
+        """
+        path = []
+        for part in self._builder:
+            if isinstance(part, str):
+                path.append(part)
+                continue
+            name, converter, regex, safe = part
+            if name not in kwargs:
+                raise BuildError('Missing {%s} for %s' % (name, self.path))
+            value = converter.to_url(kwargs[name])
+            if not regex.match(value):
+                raise BuildError('%r is not a valid value for {%s} in %s' % (
+                    kwargs[name], name, self.path))
+            if not _NEEDS_NO_QUOTING.match(value):
+                value = quote(value, safe)
+            path.append(value)
+        return ''.join(path)
 
     def match(self, path):
-        """Return True if path matches the Route's path, False otherwise.
+        """Return a RouteMatch if path matches the route's path, else None.
 
-        If the route's path has dynamic segments (e.g. '/{foo}'), and the given
-        path is a match, the matching segments will be made available as a dict
-        at route.kwargs.
+        If the route's path has dynamic segments (e.g. '/{foo}'), the matching
+        segments are available as a dict at match.kwargs. The route itself is
+        never modified, so it is safe to share between threads.
 
         """
-        match = self._path_regex.match(path)
+        regex, placeholders = self._path_regex
+        match = regex.match(path)
         if not match:
-            return False
+            return None
+        return RouteMatch(self, convert(placeholders, match.groups()))
+
+
+def _same_pattern(route, other):
+    return (compile_template(route.path)[0] ==
+            compile_template(other.path)[0])
+
 
-        self.kwargs = match.groupdict()
-        return True
+class RouteMatch(namedtuple('RouteMatch', ['route', 'kwargs'])):
+    """The result of matching a path: a route and the kwargs captured."""
+    __slots__ = ()
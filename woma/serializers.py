@@ -0,0 +1,58 @@
+"""JSON serializers for `woma.http.Request.json` and `Response.write_json`.
+
+A serializer has a ``loads`` function turning bytes into python objects, and
+a ``dumps`` function turning python objects into UTF-8 bytes, so request and
+response bodies never go through ``str``:
+
+>>> STDLIB.dumps({'id': 3, 'tags': ['new']})
+b'{"id":3,"tags":["new"]}'
+>>> STDLIB.loads(b'{"id": 3}')
+{'id': 3}
+
+``JSON`` is the default serializer: orjson if it's installed, then ujson,
+then the standard library's json module. To use another one, set
+``Request.json_serializer`` and ``Response.json_serializer``.
+
+"""
+import json
+from collections import namedtuple
+
+
+class Serializer(namedtuple('Serializer', ['name', 'loads', 'dumps'])):
+    """A named pair of loads (bytes to object) and dumps (object to bytes)."""
+
+    __slots__ = ()
+
+
+def _stdlib_dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode(
+        'utf-8')
+
+
+STDLIB = Serializer('json', json.loads, _stdlib_dumps)
+
+
+def _orjson():
+    import orjson
+    return Serializer('orjson', orjson.loads, orjson.dumps)
+
+
+def _ujson():
+    import ujson
+
+    def dumps(obj):
+        return ujson.dumps(obj, ensure_ascii=False).encode('utf-8')
+    return Serializer('ujson', ujson.loads, dumps)
+
+
+def fastest():
+    """Return the fastest serializer that is installed."""
+    for serializer in (_orjson, _ujson):
+        try:
+            return serializer()
+        except ImportError:
+            pass
+    return STDLIB
+
+
+JSON = fastest()
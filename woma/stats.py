@@ -0,0 +1,59 @@
+"""Timing and latency statistics, for benchmarks and load tests."""
+import time
+from collections import namedtuple
+
+
+class Stats(namedtuple('Stats', ['count', 'total', 'p50', 'p99'])):
+    """Latency stats for a run: the number of calls and times in seconds.
+
+    ``total`` is the time the whole run took, which is less than the sum of
+    the latencies if calls were made concurrently.
+
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_latencies(cls, latencies, total=None):
+        """Summarize a list of per-call latencies.
+
+        ``total`` defaults to the sum of the latencies.
+
+        >>> Stats.from_latencies([0.1, 0.2, 0.3, 0.4]).p50
+        0.2
+
+        """
+        latencies = sorted(latencies)
+        return cls(
+            count=len(latencies),
+            total=sum(latencies) if total is None else total,
+            p50=percentile(latencies, 50),
+            p99=percentile(latencies, 99))
+
+    @property
+    def throughput(self):
+        """Calls per second."""
+        return self.count / self.total if self.total else float('inf')
+
+
+def percentile(sorted_values, percent):
+    """Return the value below which ``percent`` percent of values fall.
+
+    >>> percentile([1, 2, 3, 4, 5, 6, 7, 8, 9, 10], 90)
+    9
+
+    """
+    if not sorted_values:
+        return 0.0
+    index = max(0, int(round(percent / 100.0 * len(sorted_values))) - 1)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def measure(func, args_list, clock=time.perf_counter):
+    """Call func once with each args tuple and return the Stats."""
+    latencies = []
+    for args in args_list:
+        start = clock()
+        func(*args)
+        latencies.append(clock() - start)
+    return Stats.from_latencies(latencies)
@@ -0,0 +1,324 @@
+"""Load routes in bulk from a table, e.g. one generated from a spec.
+
+A table maps paths to controllers. Controllers can be given as import
+strings (``'package.module:function'``), which are imported on their first
+request (or by ``router.warmup()``), so loading a large table is cheap:
+
+>>> from woma.http import Client
+>>> from woma.router import Router
+>>> router = Router.from_table({
+...     '/': 'woma.controllers:not_found',
+...     '/articles/{id:int}': {
+...         'get': 'woma.controllers:not_found',
+...         'name': 'article',
+...     },
+... })
+>>> router.url_for('article', id=3)
+'/articles/3'
+>>> Client(router).get('/articles/3').status_code
+404
+
+Each path maps to either a controller for every method, or a dict of:
+
+- HTTP methods (``get``, ``post``, ..., or others like ``PROPFIND``) mapped
+  to controllers.
+- ``default``: a controller for the standard methods without one.
+- ``name``: a name for the route, for ``router.url_for``.
+
+The whole table is checked before any route is added, and every problem is
+reported in a single woma.exceptions.RouteError. ``Router.from_file`` loads
+the same table from a JSON file.
+
+**Compiled tables:**
+
+For very large tables, ``compile_table`` saves the routes together with the
+lookups built from them, so workers can load them without checking the
+table or parsing any paths:
+
+>>> import os, tempfile
+>>> filename = os.path.join(tempfile.mkdtemp(), 'routes.compiled')
+>>> table = {'/articles/{id:int}': 'woma.controllers:not_found'}
+>>> checksum = compile_table(table, filename)
+>>> router = Router.from_compiled(filename, table)
+>>> Client(router).get('/articles/3').status_code
+404
+
+Controllers are saved as import strings, so controllers given as functions
+must be importable by name. The file also holds a checksum of the table it
+was compiled from (see ``table_checksum``). Pass the table to
+``Router.from_compiled`` to check that the file is up to date with it, or
+compare checksums some other way, e.g. when deploying. Files hold JSON, so
+loading one never runs code, other than importing the controllers it names.
+
+"""
+import gc
+import hashlib
+import importlib
+import json
+import re
+
+from woma.converters import compile_template
+from woma.endpoints import Endpoint
+from woma.exceptions import RouteError
+
+# the start of compiled table files, with the version of their format
+MAGIC = b'woma compiled routes 2\n'
+
+# the methods with their own Endpoint argument
+METHODS = ('get', 'post', 'put', 'patch', 'delete', 'head', 'options')
+
+_IMPORT_STRING = re.compile(r'^[A-Za-z_][\w.]*:[A-Za-z_][\w.]*$')
+_METHOD = re.compile(r'^[A-Za-z]+$')
+
+
+class LazyController(object):
+    """A controller that imports the real one on its first call.
+
+    >>> controller = LazyController('woma.controllers:not_found')
+    >>> controller
+    LazyController('woma.controllers:not_found')
+    >>> controller.resolve().__name__
+    'not_found'
+
+    """
+
+    def __init__(self, import_string):
+        self.import_string = import_string
+        self.controller = None
+
+    def __repr__(self):
+        return 'LazyController(%r)' % self.import_string
+
+    def __eq__(self, other):
+        return (isinstance(other, LazyController) and
+                self.import_string == other.import_string)
+
+    def __hash__(self):
+        return hash(self.import_string)
+
+    def __call__(self, request, response):
+        controller = self.controller or self.resolve()
+        return controller(request, response)
+
+    def resolve(self):
+        """Import and return the controller."""
+        if self.controller is None:
+            self.controller = import_string(self.import_string)
+        return self.controller
+
+
+def import_string(string):
+    """Return the object named by a ``'package.module:attribute'`` string."""
+    module_name, _, attributes = string.partition(':')
+    obj = importlib.import_module(module_name)
+    for attribute in attributes.split('.'):
+        obj = getattr(obj, attribute)
+    return obj
+
+
+def load_table(router, table, lazy=True):
+    """Add the routes in table to router. See the module docstring.
+
+    Unless ``lazy`` is True, controllers are imported straight away, and
+    failed imports are reported with the table's other problems.
+
+    """
+    errors = validate_table(table, set(router.routes.names))
+    routes = []
+    if not errors:
+        for path, spec in table.items():
+            try:
+                routes.append((path, _endpoint(spec, lazy), _name(spec)))
+            except (ImportError, AttributeError) as e:
+                errors.append('%s: %s' % (path, e))
+    if errors:
+        raise RouteError('Invalid route table:\n' + '\n'.join(errors))
+
+    from woma.router import Route
+    router.routes.extend(
+        Route(path, endpoint, name) for path, endpoint, name in routes)
+
+
+def load_file(router, filename, lazy=True):
+    """Add the routes in a JSON file to router. See load_table."""
+    with open(filename) as f:
+        table = json.load(f)
+    load_table(router, table, lazy)
+
+
+def compile_table(table, filename):
+    """Save the routes in table, and their lookups, to filename.
+
+    Returns the table's checksum. Raises woma.exceptions.RouteError if the
+    table is invalid, or if a controller can't be saved as an import string.
+
+    """
+    errors = validate_table(table)
+    if errors:
+        raise RouteError('Invalid route table:\n' + '\n'.join(errors))
+    checksum = table_checksum(table)
+    specs = [(path, _saved_spec(spec)) for path, spec in table.items()]
+
+    from woma.router import Route, Routes
+    routes = Routes()
+    routes.extend(Route(path, _endpoint(spec, lazy=True), _name(spec))
+                  for path, spec in specs)
+    payload = json.dumps({
+        'checksum': checksum,
+        'table': specs,
+        'lookups': routes.dump(),
+    }, separators=(',', ':'), allow_nan=False).encode('utf-8')
+    with open(filename, 'wb') as f:
+        f.write(MAGIC + hashlib.sha256(payload).digest() + payload)
+    return checksum
+
+
+def load_compiled(filename, table=None, lazy=True, cache_size=0):
+    """Return a woma.router.Routes from a file saved by compile_table.
+
+    Raises woma.exceptions.RouteError if the file isn't a compiled table, if
+    it is corrupt, or if ``table`` is given and the file wasn't compiled from
+    it. See Routes for ``cache_size``.
+
+    """
+    payload = _read_compiled(filename)
+    from woma.router import Route, Routes
+
+    # nothing loaded here is garbage, so don't look for any while loading
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        data = json.loads(payload.decode('utf-8'))
+        if table is not None and table_checksum(table) != data['checksum']:
+            raise RouteError('%s was not compiled from this table' % filename)
+        routes = [Route(path, _endpoint(spec, lazy), _name(spec))
+                  for path, spec in data['table']]
+        return Routes.load(routes, data['lookups'], cache_size)
+    finally:
+        if collecting:
+            gc.enable()
+
+
+def table_checksum(table):
+    """Return a checksum of table that changes whenever its routes do.
+
+    >>> table_checksum({'/': 'app:home'}) == table_checksum({'/': 'app:home'})
+    True
+    >>> table_checksum({'/': 'app:home'}) == table_checksum({'/': 'app:index'})
+    False
+
+    """
+    specs = [(path, _saved_spec(spec)) for path, spec in table.items()]
+    text = json.dumps(specs, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def validate_table(table, names=()):
+    """Return a list of the problems with table, if any.
+
+    ``names`` are route names that are already taken.
+
+    >>> validate_table({'articles': 'app:articles', '/a/{id:num}': {}})
+    ... # doctest: +NORMALIZE_WHITESPACE
+    ["articles: paths must start with '/'",
+     "/a/{id:num}: Unknown converter 'num' in {id:num}",
+     '/a/{id:num}: no controllers']
+
+    """
+    errors = []
+    names = set(names)
+    if not hasattr(table, 'items'):
+        return ['the table must map paths to controllers']
+    for path, spec in table.items():
+        if not isinstance(path, str) or not path.startswith('/'):
+            errors.append("%s: paths must start with '/'" % (path,))
+        else:
+            try:
+                compile_template(path)
+            except RouteError as e:
+                errors.append('%s: %s' % (path, e))
+
+        if not isinstance(spec, dict):
+            spec = {'default': spec}
+        name = spec.get('name')
+        if name is not None:
+            if name in names:
+                errors.append('%s: duplicate route name %r' % (path, name))
+            names.add(name)
+
+        controllers = [(key, value) for key, value in spec.items()
+                       if key != 'name']
+        if not controllers:
+            errors.append('%s: no controllers' % path)
+        for key, controller in controllers:
+            if key != 'default' and not _METHOD.match(key):
+                errors.append('%s: %r is not an HTTP method' % (path, key))
+            if isinstance(controller, str):
+                if not _IMPORT_STRING.match(controller):
+                    errors.append(
+                        "%s: %r is not a 'module:controller' import string"
+                        % (path, controller))
+            elif not callable(controller):
+                errors.append('%s: %r is not a controller' % (
+                    path, controller))
+    return errors
+
+
+def _endpoint(spec, lazy):
+    if not isinstance(spec, dict):
+        spec = {'default': spec}
+    kwargs = {}
+    methods = {}
+    for key, controller in spec.items():
+        if key == 'name':
+            continue
+        if isinstance(controller, str):
+            controller = LazyController(controller)
+            if not lazy:
+                controller.resolve()
+        if key == 'default' or key.lower() in METHODS:
+            kwargs[key.lower()] = controller
+        else:
+            methods[key] = controller
+    return Endpoint(methods=methods, **kwargs)
+
+
+def _read_compiled(filename):
+    # the JSON in a compiled table file, once it has been checked
+    with open(filename, 'rb') as f:
+        content = f.read()
+    if not content.startswith(MAGIC):
+        raise RouteError('%s is not a compiled route table' % filename)
+    start = len(MAGIC) + hashlib.sha256().digest_size
+    payload = content[start:]
+    if hashlib.sha256(payload).digest() != content[len(MAGIC):start]:
+        raise RouteError('%s is corrupt' % filename)
+    return payload
+
+
+def _saved_spec(spec):
+    # the spec as a dict, with import strings for controllers
+    if not isinstance(spec, dict):
+        spec = {'default': spec}
+    return {key: value if key == 'name' else _import_path(value)
+            for key, value in spec.items()}
+
+
+def _import_path(controller):
+    if isinstance(controller, str):
+        return controller
+    if isinstance(controller, LazyController):
+        return controller.import_string
+    path = '%s:%s' % (getattr(controller, '__module__', None),
+                      getattr(controller, '__qualname__', None))
+    try:
+        found = import_string(path)
+    except (ImportError, AttributeError):
+        found = None
+    if found is not controller:
+        raise RouteError('%r has no import string' % (controller,))
+    return path
+
+
+def _name(spec):
+    return spec.get('name') if isinstance(spec, dict) else None